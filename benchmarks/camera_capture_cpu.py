@@ -0,0 +1,150 @@
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from vision.frame_grabber import FrameGrabber
+
+# Compares process CPU time (total and per analysed frame) for the old monitoring
+# loop and the current one, with the same control flow as the monitor:
+# - old: cap.read() of every frame; a frame is analysed once ANALYSIS_INTERVAL
+#   has passed since the last frame with a face, so with nobody in view every
+#   frame is analysed
+# - current: the FrameGrabber (grab() on a capture thread, retrieve() only the
+#   frame that gets analysed), sleeping until the next analysis is due; the
+#   cadence advances after every analysed frame, face or not
+# so only the capture loop differs.
+# Source: a video file given as argument, else webcam 0, else a synthetic
+# 1280x720 MJPG clip; files are played back at their own frame rate.
+# Run from the repository root: python -m benchmarks.camera_capture_cpu [video]
+
+DURATION_SECONDS = 10
+ANALYSIS_INTERVAL = 1.0
+CASCADE_PATH = "haarcascades/haarcascade_frontalface_default.xml"
+
+
+# VIDEO FILE PLAYED BACK IN REAL TIME, LOOPING, WITH THE VideoCapture API
+class PacedCapture:
+    def __init__(self, path):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        self.next_frame = time.monotonic()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def grab(self):
+        delay = self.next_frame - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_frame = max(self.next_frame + 1 / self.fps, time.monotonic() - 1 / self.fps)
+        if self.cap.grab():
+            return True
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return self.cap.grab()
+
+    def retrieve(self):
+        return self.cap.retrieve()
+
+    def read(self):
+        return self.retrieve() if self.grab() else (False, None)
+
+    def release(self):
+        self.cap.release()
+
+
+def synthesize_clip(path, seconds=5, fps=30, width=1280, height=720):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+    gradient = np.linspace(40, 200, width, dtype=np.uint8)
+    background = np.repeat(np.tile(gradient, (height, 1))[:, :, np.newaxis], 3, axis=2)
+    for i in range(seconds * fps):
+        frame = background.copy()
+        x = width // 4 + (i * width // 120) % (width // 2)
+        cv2.circle(frame, (x, height // 2), height // 6, (200, 180, 160), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def open_source(tmp):
+    if len(sys.argv) > 1:
+        return lambda: PacedCapture(sys.argv[1]), sys.argv[1]
+    camera = cv2.VideoCapture(0)
+    if camera.isOpened():
+        camera.release()
+
+        def open_camera():
+            cap = cv2.VideoCapture(0)
+            cap.set(cv2.CAP_PROP_FPS, 30)
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+            return cap
+        return open_camera, "webcam 0 (1280x720 @ 30)"
+    path = os.path.join(tmp, "synthetic.avi")
+    synthesize_clip(path)
+    return lambda: PacedCapture(path), "synthetic 1280x720 MJPG @ 30"
+
+
+def analyse(face_cascade, frame):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+
+
+def read_every_frame(open_capture, face_cascade):
+    cap = open_capture()
+    analysed = 0
+    last_capture = time.time()
+    end = time.monotonic() + DURATION_SECONDS
+    while time.monotonic() < end:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        current_time = time.time()
+        if current_time - last_capture >= ANALYSIS_INTERVAL:
+            faces = analyse(face_cascade, frame)
+            analysed += 1
+            if len(faces):
+                last_capture = current_time
+    cap.release()
+    return analysed
+
+
+def latest_frame_grabber(open_capture, face_cascade):
+    grabber = FrameGrabber(open_capture)
+    grabber.start()
+    analysed = 0
+    last_capture = time.time()
+    end = time.monotonic() + DURATION_SECONDS
+    while time.monotonic() < end:
+        time.sleep(max(0.0, last_capture + ANALYSIS_INTERVAL - time.time()))
+        ret, frame = grabber.read()
+        if not ret:
+            break
+        current_time = time.time()
+        if current_time - last_capture >= ANALYSIS_INTERVAL:
+            last_capture = current_time
+            analyse(face_cascade, frame)
+            analysed += 1
+    grabber.stop()
+    return analysed
+
+
+def main():
+    face_cascade = cv2.CascadeClassifier(CASCADE_PATH)
+    with tempfile.TemporaryDirectory() as tmp:
+        open_capture, label = open_source(tmp)
+        print(f"source: {label}, {DURATION_SECONDS}s per loop")
+        print(f"{'loop':<22} {'analysed':>8} {'CPU s':>8} {'CPU %':>6} {'CPU ms/analysed frame':>22}")
+        for name, loop in [("cap.read() every frame", read_every_frame), ("FrameGrabber", latest_frame_grabber)]:
+            cpu_start = time.process_time()
+            analysed = loop(open_capture, face_cascade)
+            cpu = time.process_time() - cpu_start
+            print(f"{name:<22} {analysed:8d} {cpu:8.2f} {cpu / DURATION_SECONDS * 100:6.1f} "
+                  f"{cpu / max(analysed, 1) * 1000:22.1f}")
+
+
+if __name__ == "__main__":
+    main()
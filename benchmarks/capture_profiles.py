@@ -0,0 +1,74 @@
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+
+from benchmarks.camera_capture_cpu import PacedCapture, synthesize_clip
+from vision.capture_profiles import CAPTURE_PROFILES, open_capture
+from vision.frame_grabber import FrameGrabber
+
+# Runs the capture + analysis loop (FrameGrabber, grayscale, full-frame Haar
+# detection at the profile's cadence) for every capture profile, each in a
+# fresh process, and reports CPU use and peak RSS. Uses webcam 0 when one can
+# be opened, otherwise a synthetic MJPG clip at the profile's resolution and
+# frame rate played back in real time.
+# Run from the repository root: python -m benchmarks.capture_profiles
+
+DURATION_SECONDS = 15
+CASCADE_PATH = "haarcascades/haarcascade_frontalface_default.xml"
+
+
+def run_profile(name, clip_dir):
+    profile = CAPTURE_PROFILES[name]
+    camera = cv2.VideoCapture(0)
+    if camera.isOpened():
+        camera.release()
+        source = lambda: open_capture(profile)
+    else:
+        path = os.path.join(clip_dir, f"{name}.avi")
+        synthesize_clip(path, seconds=5, fps=profile.fps, width=profile.width, height=profile.height)
+        source = lambda: PacedCapture(path)
+
+    face_cascade = cv2.CascadeClassifier(CASCADE_PATH)
+    grabber = FrameGrabber(source)
+    grabber.start()
+    analysed = 0
+    cpu_start, wall_start = time.process_time(), time.monotonic()
+    last_capture = time.time()
+    while time.monotonic() - wall_start < DURATION_SECONDS:
+        time.sleep(max(0.0, last_capture + profile.analysis_interval - time.time()))
+        ret, frame = grabber.read()
+        if not ret:
+            break
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+        analysed += 1
+        last_capture = time.time()
+    grabber.stop()
+    cpu = time.process_time() - cpu_start
+    wall = time.monotonic() - wall_start
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{name:<10} {profile.width:>5}x{profile.height:<5} {profile.fps:>4} {profile.analysis_interval:>6.1f} "
+          f"{analysed:>8} {cpu / wall * 100:>7.1f} {cpu / max(analysed, 1) * 1000:>10.1f} {rss:>9.1f}")
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--profile":
+        run_profile(sys.argv[2], sys.argv[3])
+        return
+
+    print(f"{DURATION_SECONDS}s per profile, each in its own process")
+    print(f"{'profile':<10} {'size':>11} {'fps':>4} {'every':>6} {'analysed':>8} {'CPU %':>7} "
+          f"{'CPU ms/frm':>10} {'peak MiB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in CAPTURE_PROFILES:
+            subprocess.run([sys.executable, "-m", "benchmarks.capture_profiles", "--profile", name, tmp],
+                           check=True, stderr=subprocess.DEVNULL)
+
+
+if __name__ == "__main__":
+    main()
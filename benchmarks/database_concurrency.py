@@ -0,0 +1,126 @@
+import os
+import tempfile
+import threading
+import time
+import random
+
+import numpy as np
+
+import services.database as db
+from services.batch_writer import BatchWriter
+from services.connection_manager import ConnectionManager, get_busy_retry_count
+from services.schema import migrate
+
+# Runs the monitor's writers concurrently (facial samples, keystroke summaries,
+# the per-minute summary and the recommendation path) against one database file
+# and reports busy retries, slow (>10 ms) lock waits and write latency
+# percentiles, first with the old rollback journal and then in WAL mode.
+# Facial samples arrive at FACIAL_RATE_HZ and go through the BatchWriter, so
+# their row times its group commits (lock waits and retries included), not the
+# enqueue.
+# Run from the repository root: python -m benchmarks.database_concurrency
+
+DURATION_SECONDS = 5
+SLOW_WRITE_MS = 10
+# Well above the monitor's one sample per analysed frame, with a short flush
+# interval so the run sees enough commits for its percentiles
+FACIAL_RATE_HZ = 50
+FACIAL_FLUSH_INTERVAL = 0.1
+
+
+def facial_writer(stop, record):
+    next_sample = time.monotonic()
+    while not stop.is_set():
+        db.store_facial_expression_data(random.uniform(0, 100))
+        next_sample += 1 / FACIAL_RATE_HZ
+        time.sleep(max(0.0, next_sample - time.monotonic()))
+
+
+def keystroke_writer(stop, record):
+    while not stop.is_set():
+        record(db.store_keystroke_summary, random.randint(0, 1), random.uniform(0, 100))
+        time.sleep(0.005)
+
+
+def summary_writer(stop, record):
+    while not stop.is_set():
+        record(db.get_latest_facial_expression_data, 1)
+        time.sleep(0.01)
+
+
+def recommendation_writer(stop, record):
+    while not stop.is_set():
+        record(db.store_realtime_stress, 50.0, 50.0, 1)
+        rec_id = db.get_recommendations(1)[0]
+        record(db.set_recommendation_score, rec_id, random.random() < 0.5)
+        time.sleep(0.005)
+
+
+def run(label, **manager_options):
+    with tempfile.TemporaryDirectory() as tmp:
+        db.connection_manager = ConnectionManager(os.path.join(tmp, "stress.db"), initializer=migrate, **manager_options)
+        db.init_database()
+
+        latencies = {}
+        failures = []
+        stop = threading.Event()
+        retries_before = get_busy_retry_count()
+
+        def make_recorder(name):
+            samples = latencies.setdefault(name, [])
+
+            def record(func, *args):
+                start = time.perf_counter()
+                try:
+                    func(*args)
+                except Exception as e:
+                    failures.append(f"{name}: {e}")
+                samples.append((time.perf_counter() - start) * 1000)
+            return record
+
+        db.batch_writer = BatchWriter(db.get_connection, flush_interval=FACIAL_FLUSH_INTERVAL)
+        db._recommendation_catalog = None
+        commit = db.batch_writer._commit
+        commit_samples = latencies.setdefault("facial_batch_commit", [])
+
+        # Failures still reach the writer, which then skips the batch's on_commit callbacks
+        def timed_commit(batch):
+            start = time.perf_counter()
+            try:
+                commit(batch)
+            finally:
+                commit_samples.append((time.perf_counter() - start) * 1000)
+        db.batch_writer._commit = timed_commit
+
+        workers = [facial_writer, keystroke_writer, summary_writer, recommendation_writer]
+        threads = [threading.Thread(target=w, args=(stop, make_recorder(w.__name__))) for w in workers]
+        for t in threads:
+            t.start()
+        time.sleep(DURATION_SECONDS)
+        stop.set()
+        for t in threads:
+            t.join()
+
+        db.batch_writer.stop()
+        db.connection_manager.close_all()
+
+    print(f"\n{label}")
+    print(f"  busy retries: {get_busy_retry_count() - retries_before}, failed writes: {len(failures)}")
+    for name, samples in latencies.items():
+        if not samples:
+            continue
+        values = np.array(samples)
+        print(f"  {name:<22} n={len(values):>6}  p50={np.percentile(values, 50):6.2f} ms  "
+              f"p99={np.percentile(values, 99):7.2f} ms  max={values.max():7.2f} ms  "
+              f"waits>{SLOW_WRITE_MS}ms={int((values > SLOW_WRITE_MS).sum())}")
+    for failure in failures[:5]:
+        print(f"  ! {failure}")
+
+
+def main():
+    run("rollback journal, synchronous=FULL", journal_mode="DELETE", synchronous="FULL")
+    run("WAL, synchronous=NORMAL")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from services.connection_manager import ConnectionManager
+from services.batch_writer import BatchWriter
+
+# Compares facial sample writes per second when every write opens its own
+# bare sqlite3 connection (the old unmanaged pattern) against writes that go
+# through the ConnectionManager, and against group-committed BatchWriter rows.
+# Run from the repository root: python -m benchmarks.database_writes
+
+WRITES = 2000
+THREADS = 4
+
+CREATE_SQL = """
+    CREATE TABLE IF NOT EXISTS facial_expression_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        stress_value REAL NOT NULL
+    )
+"""
+INSERT_SQL = "INSERT INTO facial_expression_data (timestamp, stress_value) VALUES (?, ?)"
+
+
+def write_with_new_connection(db_name, count):
+    for i in range(count):
+        conn = sqlite3.connect(db_name)
+        conn.execute(INSERT_SQL, (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), float(i % 100)))
+        conn.commit()
+        conn.close()
+
+
+def write_with_manager(manager, count):
+    for i in range(count):
+        with manager.connection() as conn:
+            conn.execute(INSERT_SQL, (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), float(i % 100)))
+
+
+def write_with_batch_writer(writer, count):
+    for i in range(count):
+        writer.enqueue(INSERT_SQL, (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), float(i % 100)))
+
+
+def run(label, target, args_for_thread):
+    threads = [threading.Thread(target=target, args=args_for_thread()) for _ in range(THREADS)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    total = WRITES * THREADS
+    print(f"{label:<28} {total} writes in {elapsed:.2f}s -> {total / elapsed:,.0f} writes/s")
+    return total / elapsed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, "bench.db")
+        conn = sqlite3.connect(db_name)
+        conn.execute(CREATE_SQL)
+        conn.commit()
+        conn.close()
+
+        before = run("connect per write", write_with_new_connection, lambda: (db_name, WRITES))
+
+        manager = ConnectionManager(db_name)
+        after = run("connection manager", write_with_manager, lambda: (manager, WRITES))
+
+        writer = BatchWriter(manager.connection)
+
+        def write_and_flush(count):
+            write_with_batch_writer(writer, count)
+            writer.flush()
+        batched = run("batch writer (committed)", write_and_flush, lambda: (WRITES,))
+        writer.stop()
+        manager.close_all()
+
+        print(f"speedup (manager): {after / before:.2f}x")
+        print(f"speedup (batched): {batched / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
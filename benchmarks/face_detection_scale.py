@@ -0,0 +1,53 @@
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+from benchmarks.face_tracking import CASCADE_PATH, load_gray_frames, recorded_video, run
+from vision.face_tracker import FaceTracker, box_iou
+
+# Compares full-frame Haar detection on the full-resolution frame with detection
+# on downscaled copies (fixed frame widths, and the adaptive scale that sizes
+# the last face to adaptive_face_px) over a recorded video. Every frame gets a
+# full detection (no ROI tracking). Reports latency, recall against the
+# full-resolution detections and the mean IoU of the remapped boxes.
+# Pass a recording; without one, frames are recorded from webcam 0.
+# Run from the repository root: python -m benchmarks.face_detection_scale [video]
+
+
+def main():
+    face_cascade = cv2.CascadeClassifier(CASCADE_PATH)
+    with tempfile.TemporaryDirectory() as tmp:
+        frames = load_gray_frames(recorded_video(tmp))
+    if not frames:
+        sys.exit("could not read any frames")
+    height, width = frames[0].shape
+    print(f"{len(frames)} frames at {width}x{height}")
+
+    full = FaceTracker(face_cascade, detection_width=None, adaptive_face_px=None)
+    reference, full_ms = run(frames, full.detect_full)
+    with_face = [i for i, box in enumerate(reference) if box is not None]
+    print(f"full resolution finds a face in {len(with_face)} frames")
+
+    print(f"{'detection':<22} {'mean ms':>8} {'p95 ms':>8} {'recall %':>9} {'extra':>6} {'mean IoU':>9}")
+    print(f"{'full resolution':<22} {full_ms.mean():8.1f} {np.percentile(full_ms, 95):8.1f} "
+          f"{100.0:9.1f} {0:6d} {1.0:9.3f}")
+
+    variants = [(f"frame width {w}", FaceTracker(face_cascade, redetect_every=0, detection_width=w,
+                                                  adaptive_face_px=None))
+                for w in (640, 320, 160) if w < width]
+    adaptive = FaceTracker(face_cascade, redetect_every=0)
+    variants.append((f"adaptive ({adaptive.adaptive_face_px} px face)", adaptive))
+    for label, tracker in variants:
+        boxes, timings = run(frames, tracker.detect)
+        found = [i for i in with_face if boxes[i] is not None]
+        extra = sum(1 for i, box in enumerate(boxes) if box is not None and reference[i] is None)
+        overlaps = [box_iou(reference[i], boxes[i]) for i in found]
+        recall = len(found) / len(with_face) * 100 if with_face else 0.0
+        print(f"{label:<22} {timings.mean():8.1f} {np.percentile(timings, 95):8.1f} {recall:9.1f} "
+              f"{extra:6d} {np.mean(overlaps) if overlaps else 0:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
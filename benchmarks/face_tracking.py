@@ -0,0 +1,103 @@
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from vision.face_tracker import FaceTracker, box_iou
+
+# Runs full-resolution, full-frame Haar detection and the detect-then-track
+# FaceTracker (with its default downscaling) over the same recorded video and
+# reports detection time per frame and how often the tracker misses a face that
+# full detection finds (face-loss rate), plus the mean IoU between the two boxes
+# when both find one.
+# Pass a recording; without one, RECORD_SECONDS are recorded from webcam 0.
+# Run from the repository root: python -m benchmarks.face_tracking [video]
+
+CASCADE_PATH = "haarcascades/haarcascade_frontalface_default.xml"
+RECORD_SECONDS = 20
+MAX_FRAMES = 600
+
+
+def record_webcam(path, seconds, width=1280, height=720, fps=30):
+    cap = cv2.VideoCapture(0)
+    if not cap.isOpened():
+        return False
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    cap.set(cv2.CAP_PROP_FPS, fps)
+    ok, frame = cap.read()
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (frame.shape[1], frame.shape[0]))
+    print(f"recording {seconds}s from webcam 0 - move around, look away, leave the frame...")
+    end = time.monotonic() + seconds
+    while ok and time.monotonic() < end:
+        writer.write(frame)
+        ok, frame = cap.read()
+    writer.release()
+    cap.release()
+    return True
+
+
+def recorded_video(tmp):
+    if len(sys.argv) > 1:
+        return sys.argv[1]
+    path = os.path.join(tmp, "webcam.avi")
+    if not record_webcam(path, RECORD_SECONDS):
+        sys.exit("No recording given and no webcam to record one: "
+                 "python -m benchmarks.face_tracking path/to/video.avi")
+    return path
+
+
+def load_gray_frames(path, limit=MAX_FRAMES):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < limit:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    cap.release()
+    return frames
+
+
+def run(frames, detect):
+    boxes, timings = [], []
+    for gray in frames:
+        start = time.perf_counter()
+        faces = detect(gray)
+        timings.append((time.perf_counter() - start) * 1000)
+        boxes.append(faces[0] if len(faces) else None)
+    return boxes, np.array(timings)
+
+
+def main():
+    face_cascade = cv2.CascadeClassifier(CASCADE_PATH)
+    with tempfile.TemporaryDirectory() as tmp:
+        frames = load_gray_frames(recorded_video(tmp))
+    if not frames:
+        sys.exit("could not read any frames")
+    height, width = frames[0].shape
+    print(f"{len(frames)} frames at {width}x{height}")
+
+    full = FaceTracker(face_cascade, detection_width=None, adaptive_face_px=None)
+    reference, full_ms = run(frames, full.detect_full)
+    with_face = [i for i, box in enumerate(reference) if box is not None]
+    print(f"full detection finds a face in {len(with_face)} frames")
+
+    print(f"{'mode':<18} {'mean ms':>8} {'p95 ms':>8} {'full dets':>9} {'loss %':>7} {'mean IoU':>9}")
+    print(f"{'full frame':<18} {full_ms.mean():8.1f} {np.percentile(full_ms, 95):8.1f} {len(frames):9d} "
+          f"{0.0:7.1f} {1.0:9.3f}")
+    for redetect_every in (5, 10, 30):
+        tracker = FaceTracker(face_cascade, redetect_every=redetect_every)
+        boxes, tracked_ms = run(frames, tracker.detect)
+        missed = sum(1 for i in with_face if boxes[i] is None)
+        overlaps = [box_iou(reference[i], boxes[i]) for i in with_face if boxes[i] is not None]
+        loss = missed / len(with_face) * 100 if with_face else 0.0
+        print(f"{'track, N=' + str(redetect_every):<18} {tracked_ms.mean():8.1f} {np.percentile(tracked_ms, 95):8.1f} "
+              f"{tracker.full_detections:9d} {loss:7.1f} {np.mean(overlaps) if overlaps else 0:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
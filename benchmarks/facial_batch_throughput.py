@@ -0,0 +1,85 @@
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.facial_inference_backends import CASCADE_PATH, MODEL_PATH
+from vision.face_batch import FaceBatch
+from vision.face_tracker import FaceTracker
+from vision.inference_backends import load_backend
+
+# Measures facial inference throughput (faces per second) against batch size:
+# crops are resized into a preallocated FaceBatch and the model runs once per
+# batch, as the monitor does with several faces per frame or several frames per
+# call. Before timing, every batched prediction is checked against predicting
+# its face alone, so results map back to the right face.
+# Face crops come from the FaceTracker on a video given as second argument;
+# without one, smoothed random crops are used.
+# Run from the repository root:
+# python -m benchmarks.facial_batch_throughput [model.h5] [video]
+
+BACKENDS = ["numpy", "tflite", "tf-function"]
+BATCH_SIZES = [1, 2, 4, 8, 16, 32]
+FACES_PER_SIZE = 1024
+CROPS = 64
+
+
+def video_crops(path, limit=CROPS):
+    tracker = FaceTracker(cv2.CascadeClassifier(CASCADE_PATH), max_faces=None)
+    cap = cv2.VideoCapture(path)
+    crops = []
+    while len(crops) < limit:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        crops.extend(gray[y:y + h, x:x + w].copy() for x, y, w, h in tracker.detect(gray))
+    cap.release()
+    return crops[:limit]
+
+
+def face_crops():
+    crops = video_crops(sys.argv[2]) if len(sys.argv) > 2 else []
+    if not crops:
+        rng = np.random.default_rng(0)
+        crops = [cv2.GaussianBlur(crop, (7, 7), 0) for crop in rng.integers(0, 256, (CROPS, 96, 96), dtype=np.uint8)]
+    return crops
+
+
+def run_batches(model, crops, batch_size):
+    batch = FaceBatch(batch_size)
+    results = []
+    start = time.perf_counter()
+    for i in range(FACES_PER_SIZE):
+        crop = crops[i % len(crops)]
+        batch.add(crop, (0, 0, crop.shape[1], crop.shape[0]), i % len(crops))
+        if batch.is_full():
+            results.extend(batch.predict(model))
+    results.extend(batch.predict(model))
+    return results, time.perf_counter() - start
+
+
+def main():
+    model_path = sys.argv[1] if len(sys.argv) > 1 else MODEL_PATH
+    crops = face_crops()
+    print(f"{len(crops)} face crops, {FACES_PER_SIZE} faces per batch size")
+    print(f"{'backend':<12} {'batch':>5} {'faces/s':>9} {'ms/batch':>9} {'max diff':>9}")
+    for name in BACKENDS:
+        try:
+            model = load_backend(model_path, name)
+        except ImportError as e:
+            print(f"{name:<12} skipped ({e})")
+            continue
+        single, _ = run_batches(model, crops, 1)
+        reference = dict(single[:len(crops)])
+        for batch_size in BATCH_SIZES:
+            run_batches(model, crops, batch_size)
+            results, seconds = run_batches(model, crops, batch_size)
+            difference = max(abs(probability - reference[key]) for key, probability in results)
+            print(f"{name:<12} {batch_size:5d} {len(results) / seconds:9.0f} "
+                  f"{seconds / -(-len(results) // batch_size) * 1000:9.2f} {difference:9.1e}")
+
+
+if __name__ == "__main__":
+    main()
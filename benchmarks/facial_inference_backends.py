@@ -0,0 +1,135 @@
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from vision.face_tracker import FaceTracker
+from vision.inference_backends import INPUT_SHAPE, check_backend, convert_to_tflite, load_backend
+
+# Loads the facial stress CNN with every inference backend, each in a fresh
+# process, and reports load time, single-face latency (what the monitor does once
+# per analysed frame), process CPU per prediction and peak RSS. The .tflite files
+# are converted up front, so their load time and memory are those of the
+# interpreter (the LiteRT runtime when installed). Before timing, each backend's
+# outputs on a golden set of faces are checked against Model.predict within
+# TOLERANCES (looser for the quantized models).
+# Golden faces are 48x48 crops found by the FaceTracker in a video given as
+# second argument; without one, smoothed random images are used.
+# Run from the repository root:
+# python -m benchmarks.facial_inference_backends [model.h5] [video]
+
+MODEL_PATH = "models/sequential_model_improved.h5"
+CASCADE_PATH = "haarcascades/haarcascade_frontalface_default.xml"
+GOLDEN_FACES = 64
+PREDICTIONS = 300
+TOLERANCES = {
+    "keras": 0.0,
+    "tf-function": 1e-4,
+    "tflite": 1e-4,
+    "tflite-dynamic": 5e-2,
+    "tflite-int8": 5e-2,
+    "numpy": 1e-4,
+}
+
+
+def video_faces(path, limit=GOLDEN_FACES):
+    tracker = FaceTracker(cv2.CascadeClassifier(CASCADE_PATH))
+    cap = cv2.VideoCapture(path)
+    faces = []
+    while len(faces) < limit:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        for x, y, w, h in tracker.detect(gray)[:1]:
+            faces.append(cv2.resize(gray[y:y + h, x:x + w], INPUT_SHAPE[:2]))
+    cap.release()
+    return faces
+
+
+def golden_faces():
+    faces = video_faces(sys.argv[2]) if len(sys.argv) > 2 else []
+    if not faces:
+        rng = np.random.default_rng(0)
+        noise = rng.integers(0, 256, (GOLDEN_FACES,) + INPUT_SHAPE[:2], dtype=np.uint8)
+        faces = [cv2.GaussianBlur(face, (7, 7), 0) for face in noise]
+    return (np.stack(faces).astype("float32") / 255.0)[..., np.newaxis]
+
+
+def run_backend(name, model_path, tmp):
+    faces = np.load(os.path.join(tmp, "faces.npy"))
+    options = {}
+    if name == "tflite-int8":
+        name, options = "tflite", {"quantization": "int8", "calibration_faces": faces}
+
+    start = time.perf_counter()
+    backend = load_backend(model_path, name, **options)
+    load_ms = (time.perf_counter() - start) * 1000
+    reference_path = os.path.join(tmp, "reference.npy")
+    if backend.name == "keras":
+        np.save(reference_path, backend.predict(faces))
+    difference = check_backend(backend, faces, np.load(reference_path), TOLERANCES[backend.name])
+
+    backend.predict(faces[:1])
+    timings = []
+    cpu_start = time.process_time()
+    for i in range(PREDICTIONS):
+        face = faces[i % len(faces)][np.newaxis]
+        start = time.perf_counter()
+        backend.predict(face)[0][0]
+        timings.append((time.perf_counter() - start) * 1000)
+    cpu_ms = (time.process_time() - cpu_start) / PREDICTIONS * 1000
+    timings = np.array(timings)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{backend.name:<15} {load_ms:8.0f} {np.median(timings):8.2f} {np.percentile(timings, 95):8.2f} "
+          f"{cpu_ms:8.2f} {rss:9.1f} {difference:9.1e}")
+
+
+# CONVERSION HAPPENS ONCE PER MODEL, IN ITS OWN PROCESS, SO THE TFLITE RUNS TIME
+# (AND MEASURE THE MEMORY OF) LOADING A CACHED FILE
+def convert_all(model_path, tmp):
+    faces = np.load(os.path.join(tmp, "faces.npy"))
+    for quantization in (None, "dynamic", "int8"):
+        convert_to_tflite(model_path, quantization, faces)
+
+
+def main():
+    if len(sys.argv) > 4 and sys.argv[1] == "--backend":
+        run_backend(sys.argv[2], sys.argv[3], sys.argv[4])
+        return
+    if len(sys.argv) > 3 and sys.argv[1] == "--convert":
+        convert_all(sys.argv[2], sys.argv[3])
+        return
+
+    model_path = sys.argv[1] if len(sys.argv) > 1 else MODEL_PATH
+    if not os.path.exists(model_path):
+        sys.exit(f"model not found: {model_path}")
+    with tempfile.TemporaryDirectory() as tmp:
+        faces = golden_faces()
+        np.save(os.path.join(tmp, "faces.npy"), faces)
+        # Converted .tflite files are cached next to the model; start from fresh ones
+        model_copy = os.path.join(tmp, os.path.basename(model_path))
+        with open(model_path, "rb") as src, open(model_copy, "wb") as dst:
+            dst.write(src.read())
+
+        subprocess.run([sys.executable, "-m", "benchmarks.facial_inference_backends", "--convert", model_copy, tmp],
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        print(f"{len(faces)} golden faces, {PREDICTIONS} single-face predictions per backend, "
+              f"each backend in its own process")
+        print(f"{'backend':<15} {'load ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'CPU ms':>8} {'peak MiB':>9} "
+              f"{'max diff':>9}")
+        for name in TOLERANCES:
+            result = subprocess.run([sys.executable, "-m", "benchmarks.facial_inference_backends",
+                                     "--backend", name, model_copy, tmp],
+                                    check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+            print(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main()
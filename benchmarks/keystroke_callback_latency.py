@@ -0,0 +1,190 @@
+import threading
+import time
+
+import numpy as np
+
+from engine.keystroke_capture import KeystrokeBuffer, key_code, stats_to_features
+from engine.keystroke_events import PRESS, RELEASE, KeystrokeConsumer, KeystrokeEventQueue
+
+# Replays bursts of typing at 20 keys/s through three versions of the keyboard
+# hook callbacks and reports how long each callback held the hook thread:
+#   locked dict   - the original callbacks (str key, shared lock, Python lists)
+#   direct ring   - callbacks writing straight into KeystrokeBuffer
+#   event queue   - callbacks only pushing (code, type, ns) for the consumer
+# A feature thread drains the capture every DRAIN_INTERVAL seconds and a
+# CPU-bound thread stands in for model inference competing for the GIL.
+# Run from the repository root: python -m benchmarks.keystroke_callback_latency
+
+KEYS_PER_SECOND = 20
+BURSTS = 4
+KEYS_PER_BURST = 40
+HOLD_SECONDS = 0.08
+PAUSE_BETWEEN_BURSTS = 0.5
+DRAIN_INTERVAL = 0.05
+
+
+class FakeKey:
+    def __init__(self, char):
+        self.char = char
+        self.vk = ord(char)
+
+    def __str__(self):
+        return self.char
+
+
+class LockedDictCapture:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.key_down_times = {}
+        self.hold_times = []
+        self.flight_times = []
+        self.last_key_up_time = None
+        self.error_count = 0
+        self.key_events_count = 0
+
+    def on_press(self, key):
+        try:
+            k = key.char
+        except AttributeError:
+            k = str(key)
+        with self.lock:
+            self.key_down_times[k] = time.time()
+            self.key_events_count += 1
+
+    def on_release(self, key):
+        try:
+            k = key.char
+        except AttributeError:
+            k = str(key)
+        now = time.time()
+        with self.lock:
+            if k in self.key_down_times:
+                self.hold_times.append((now - self.key_down_times[k]) * 1000)
+                del self.key_down_times[k]
+                if self.last_key_up_time is not None:
+                    self.flight_times.append((now - self.last_key_up_time) * 1000)
+                self.last_key_up_time = now
+            else:
+                self.error_count += 1
+
+    def drain(self):
+        with self.lock:
+            ht = self.hold_times.copy()
+            ft = self.flight_times.copy()
+            kc = self.key_events_count
+            self.hold_times.clear()
+            self.flight_times.clear()
+        mean_hold = np.mean(ht) if ht else 0
+        mean_flight = np.mean(ft) if ft else 0
+        with self.lock:
+            self.error_count = 0
+            self.key_events_count = 0
+        return mean_hold, mean_flight, kc
+
+    def stop(self):
+        pass
+
+
+class DirectRingCapture:
+    def __init__(self):
+        self.capture = KeystrokeBuffer()
+
+    def on_press(self, key):
+        self.capture.press(key_code(key), time.perf_counter_ns())
+
+    def on_release(self, key):
+        self.capture.release(key_code(key), time.perf_counter_ns())
+
+    def drain(self):
+        return stats_to_features(self.capture.drain(), DRAIN_INTERVAL / 60)
+
+    def stop(self):
+        pass
+
+
+class EventQueueCapture:
+    def __init__(self):
+        self.events = KeystrokeEventQueue()
+        self.capture = KeystrokeBuffer()
+        self.consumer = KeystrokeConsumer(self.events, [self.capture.handle_event])
+        self.consumer.start()
+
+    def on_press(self, key):
+        self.events.push(key_code(key), PRESS, time.perf_counter_ns())
+
+    def on_release(self, key):
+        self.events.push(key_code(key), RELEASE, time.perf_counter_ns())
+
+    def drain(self):
+        return stats_to_features(self.capture.drain(), DRAIN_INTERVAL / 60)
+
+    def stop(self):
+        self.consumer.stop()
+
+
+def busy_work(stop):
+    while not stop.is_set():
+        total = 0
+        for i in range(20000):
+            total += i * i
+
+
+def drainer(stop, capture):
+    while not stop.is_set():
+        capture.drain()
+        time.sleep(DRAIN_INTERVAL)
+
+
+# FIRES PRESS/RELEASE CALLBACKS ON SCHEDULE FROM ONE "HOOK" THREAD
+def type_bursts(capture):
+    keys = [FakeKey(c) for c in "the quick brown fox jumps over a lazy dog"]
+    schedule = []
+    start = 0.0
+    for _ in range(BURSTS):
+        for i in range(KEYS_PER_BURST):
+            t = start + i / KEYS_PER_SECOND
+            key = keys[i % len(keys)]
+            schedule.append((t, capture.on_press, key))
+            schedule.append((t + HOLD_SECONDS, capture.on_release, key))
+        start += KEYS_PER_BURST / KEYS_PER_SECOND + PAUSE_BETWEEN_BURSTS
+    schedule.sort(key=lambda event: event[0])
+
+    latencies = []
+    origin = time.perf_counter()
+    for t, callback, key in schedule:
+        delay = origin + t - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        begin = time.perf_counter_ns()
+        callback(key)
+        latencies.append(time.perf_counter_ns() - begin)
+    return np.array(latencies) / 1000
+
+
+def run(label, capture):
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=busy_work, args=(stop,), daemon=True),
+        threading.Thread(target=drainer, args=(stop, capture), daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+    latencies = type_bursts(capture)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    capture.stop()
+    print(f"{label:<14} {len(latencies):6d} {np.percentile(latencies, 50):10.1f} "
+          f"{np.percentile(latencies, 99):10.1f} {latencies.max():10.1f}")
+
+
+def main():
+    print(f"{BURSTS} bursts of {KEYS_PER_BURST} keys at {KEYS_PER_SECOND} keys/s, callback time in us")
+    print(f"{'callbacks':<14} {'events':>6} {'p50':>10} {'p99':>10} {'max':>10}")
+    run("locked dict", LockedDictCapture())
+    run("direct ring", DirectRingCapture())
+    run("event queue", EventQueueCapture())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import time
+import warnings
+
+import numpy as np
+
+# Compares the keystroke random forest served by scikit-learn (one-row
+# DataFrame, predict + predict_proba, as predict_and_store did) with the
+# flattened NumPy forest: model load/export time, per-prediction latency and
+# batched throughput. Also checks on a random corpus - including inputs that sit
+# exactly on split thresholds - that labels and probabilities are bit-identical.
+# Run from the repository root: python -m benchmarks.keystroke_forest
+
+MODEL_PATH = "models/keystroke/random_forest_stress_model.joblib"
+FEATURE_NAMES = ['mean_hold_time', 'mean_flight_time', 'avg_typing_speed', 'avg_error_rate']
+CORPUS_SIZE = 100_000
+SINGLE_REPEATS = 500
+FEATURE_RANGES = [(0, 400), (0, 1500), (0, 600), (0, 40)]
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<34} {(time.perf_counter() - start) * 1000:10.1f} ms")
+    return result
+
+
+def corpus(model, flat, size):
+    rng = np.random.default_rng(42)
+    X = np.column_stack([rng.uniform(low, high, size) for low, high in FEATURE_RANGES])
+    # Put a quarter of the values exactly on a split threshold for that feature
+    internal = flat.left != np.arange(len(flat.left))
+    for column in range(X.shape[1]):
+        thresholds = flat.threshold[internal & (flat.feature == column)].astype(np.float32)
+        if len(thresholds):
+            rows = rng.random(size) < 0.25
+            X[rows, column] = rng.choice(thresholds, rows.sum())
+    return X
+
+
+def main():
+    start = time.perf_counter()
+    import joblib
+    import pandas as pd
+    import sklearn.ensemble  # noqa: F401
+    print(f"{'import joblib/pandas/sklearn':<34} {(time.perf_counter() - start) * 1000:10.1f} ms")
+    from engine.keystroke_forest import FlatForest
+
+    warnings.filterwarnings("ignore")
+    model = timed("joblib.load", lambda: joblib.load(MODEL_PATH))
+    flat = timed("export to flat arrays", lambda: FlatForest.from_sklearn(model))
+    print(f"{flat.n_trees} trees, {len(flat.feature)} nodes, max depth {flat.max_depth}")
+
+    X = corpus(model, flat, CORPUS_SIZE)
+    frame = pd.DataFrame(X, columns=FEATURE_NAMES)
+    expected_labels = timed(f"sklearn predict ({CORPUS_SIZE} rows)", lambda: model.predict(frame))
+    expected_proba = timed(f"sklearn predict_proba ({CORPUS_SIZE} rows)", lambda: model.predict_proba(frame))
+    labels, proba = timed(f"flat predict ({CORPUS_SIZE} rows)", lambda: flat.predict(X))
+    identical = np.array_equal(labels, expected_labels) and np.array_equal(proba, expected_proba)
+    print(f"bit-identical labels and probabilities: {identical}")
+
+    row = X[0].tolist()
+
+    def sklearn_single():
+        features_df = pd.DataFrame([row], columns=FEATURE_NAMES)
+        return model.predict(features_df)[0], model.predict_proba(features_df)[0][1]
+
+    def flat_single():
+        labels, proba = flat.predict([row])
+        return labels[0], proba[0][1]
+
+    for label, func in [("sklearn DataFrame predict", sklearn_single), ("flat predict", flat_single)]:
+        func()
+        start = time.perf_counter()
+        for _ in range(SINGLE_REPEATS):
+            func()
+        print(f"{label + ' (1 row)':<34} {(time.perf_counter() - start) / SINGLE_REPEATS * 1e6:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+from engine.keystroke_events import PRESS, RELEASE
+from engine.keystroke_forest import load_flat_forest
+from engine.keystroke_recording import KeystrokeRecorder, load_recording, replay_session
+
+# Replays a keystroke recording through the live feature and prediction path
+# (KeystrokeBuffer, StreamingFeatures, SlidingWindowPredictor, flat forest) in
+# event time at full speed and reports throughput and the hops, predictions
+# and summaries produced. Without an argument a synthetic session of
+# SESSION_HOURS is recorded first (typing bursts separated by idle breaks).
+# Run from the repository root: python -m benchmarks.keystroke_replay [session.wmks]
+
+MODEL_PATH = "models/keystroke/random_forest_stress_model.joblib"
+SESSION_HOURS = 8
+NS_PER_SECOND = 1_000_000_000
+
+
+def synthesize(path, hours, seed=7):
+    rng = np.random.default_rng(seed)
+    session = []
+    t = 1_000 * NS_PER_SECOND
+    end = t + int(hours * 3600 * NS_PER_SECOND)
+    count = 0
+    while t < end:
+        # A typing burst of 30 s - 5 min, sometimes hurried and error-prone
+        burst_end = t + int(rng.uniform(30, 300) * NS_PER_SECOND)
+        hurried = rng.random() < 0.3
+        while t < burst_end:
+            code = int(rng.integers(32, 127))
+            hold = int(rng.normal(70 if hurried else 110, 20) * 1e6)
+            session.append((t, code, PRESS))
+            session.append((t + max(hold, 5_000_000), code, RELEASE))
+            if rng.random() < (0.04 if hurried else 0.01):
+                session.append((t + hold // 2, int(rng.integers(32, 127)), RELEASE))
+            t += int(rng.gamma(2.0, 60 if hurried else 120) * 1e6)
+            count += 1
+        # Followed by an idle break of 10 s - 20 min
+        t += int(rng.uniform(10, 1200) * NS_PER_SECOND)
+
+    # Written through the recorder in time order, as the keystroke consumer would
+    recorder = KeystrokeRecorder(path)
+    for timestamp_ns, code, event_type in sorted(session):
+        recorder.handle_event(code, event_type, timestamp_ns)
+    recorder.close()
+    return count
+
+
+def main():
+    warnings.filterwarnings("ignore")
+    model = load_flat_forest(MODEL_PATH)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if len(sys.argv) > 1:
+            path = sys.argv[1]
+        else:
+            path = os.path.join(tmp, "session.wmks")
+            start = time.perf_counter()
+            keys = synthesize(path, SESSION_HOURS)
+            print(f"recorded {keys} synthetic keystrokes over {SESSION_HOURS} h "
+                  f"in {time.perf_counter() - start:.1f}s ({os.path.getsize(path) / 2**20:.1f} MiB)")
+
+        events = load_recording(path)
+        if not len(events):
+            print("empty recording")
+            return
+        span_seconds = (int(events["t"][-1]) - int(events["t"][0])) / NS_PER_SECOND
+        event_count = len(events)
+
+        start = time.perf_counter()
+        hops = predictions = stressed = summaries = 0
+        for prediction, summary in replay_session(events, lambda: model):
+            hops += 1
+            if prediction.label is not None:
+                predictions += 1
+                stressed += prediction.label == 1
+            summaries += summary is not None
+        elapsed = time.perf_counter() - start
+        del events
+
+    print(f"replayed {event_count} events spanning {span_seconds / 3600:.1f} h in {elapsed:.2f}s "
+          f"({event_count / elapsed:.0f} events/s, {span_seconds / elapsed:.0f}x real time)")
+    print(f"active hops {hops}, predictions {predictions} ({stressed} stressed), summaries {summaries}")
+
+
+if __name__ == "__main__":
+    main()
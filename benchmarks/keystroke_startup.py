@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# Measures what loading the keystroke model costs a fresh process, each in its
+# own interpreter: the time until the process can start its threads (module
+# level work), the time of the first prediction, and peak RSS.
+#   eager joblib   - the old import-time joblib.load + DataFrame prediction
+#   lazy, no export - first prediction loads joblib and writes the flat export
+#   lazy, mmap     - first prediction memory-maps the existing flat export
+# Run from the repository root: python -m benchmarks.keystroke_startup
+
+MODEL_PATH = "models/keystroke/random_forest_stress_model.joblib"
+ROW = [120.0, 300.0, 180.0, 3.0]
+RUNS = 3
+
+EAGER = """
+import warnings; warnings.filterwarnings("ignore")
+import joblib, pandas as pd
+model = joblib.load(MODEL)
+startup = clock()
+frame = pd.DataFrame([ROW], columns=list(model.feature_names_in_))
+model.predict(frame); model.predict_proba(frame)
+"""
+
+LAZY = """
+import warnings; warnings.filterwarnings("ignore")
+from engine.keystroke_forest import load_flat_forest
+startup = clock()
+load_flat_forest(MODEL).predict([ROW])
+"""
+
+HARNESS = """
+import json, resource, sys, time
+begin = time.perf_counter()
+clock = lambda: time.perf_counter() - begin
+MODEL, ROW = sys.argv[1], json.loads(sys.argv[2])
+{body}
+first_prediction = clock() - startup
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps([startup * 1000, first_prediction * 1000, rss]))
+"""
+
+
+def measure(body, model_path, before_each=None):
+    results = []
+    for _ in range(RUNS):
+        if before_each:
+            before_each()
+        output = subprocess.run(
+            [sys.executable, "-c", HARNESS.format(body=body), model_path, json.dumps(ROW)],
+            capture_output=True, text=True, check=True, cwd=os.getcwd(),
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return [sorted(column)[len(column) // 2] for column in zip(*results)]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, os.path.basename(MODEL_PATH))
+        shutil.copy(MODEL_PATH, model_path)
+        export_dir = os.path.splitext(model_path)[0] + ".flat"
+
+        def remove_export():
+            shutil.rmtree(export_dir, ignore_errors=True)
+
+        print(f"median of {RUNS} fresh processes")
+        print(f"{'loading':<18} {'startup ms':>11} {'1st predict ms':>15} {'peak RSS MiB':>13}")
+        for label, body, before_each in [
+            ("eager joblib", EAGER, None),
+            ("lazy, no export", LAZY, remove_export),
+            ("lazy, mmap", LAZY, None),
+        ]:
+            startup, first, rss = measure(body, model_path, before_each)
+            print(f"{label:<18} {startup:11.1f} {first:15.1f} {rss:13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import os
+import random
+import tempfile
+import time
+
+import services.database as db
+from services import rollups
+from services.connection_manager import ConnectionManager
+from services.retention import RetentionWorker
+from services.schema import migrate
+
+# Fills a scratch database with HISTORY_DAYS of one-per-second facial samples
+# (plus their rollups), then runs one retention pass and reports the rows
+# deleted, the space reclaimed and window-query latency before and after.
+# Run from the repository root: python -m benchmarks.retention_report
+
+HISTORY_DAYS = 14
+SAMPLES_PER_DAY = 24 * 60 * 60
+QUERY_REPEATS = 50
+
+
+def fill(start_ms):
+    insert_sql = "INSERT INTO facial_expression_data (timestamp, stress_value) VALUES (?, ?)"
+    for day in range(HISTORY_DAYS):
+        raw_rows = []
+        statements = {}
+        for second in range(SAMPLES_PER_DAY):
+            timestamp = start_ms + (day * SAMPLES_PER_DAY + second) * 1000
+            value = random.uniform(0, 100)
+            raw_rows.append((timestamp, value))
+            for sql, params in rollups.rollup_statements(rollups.FACIAL, timestamp, value):
+                statements.setdefault(sql, []).append(params)
+        with db.get_connection() as conn:
+            conn.executemany(insert_sql, raw_rows)
+            for sql, rows in statements.items():
+                conn.executemany(sql, rows)
+
+
+def file_size(path):
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+
+def count_raw_rows():
+    with db.get_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM facial_expression_data").fetchone()[0]
+
+
+def query_latency():
+    end = db.now_ms()
+    timings = {}
+    for label, query in [
+        ("1-min facial window", lambda: db.get_latest_facial_expression_data(1, end)),
+        ("7-day series (7 points)", lambda: db.get_stress_series(rollups.FACIAL, end - 7 * 86400000, end, 7)),
+        ("full-table COUNT(*)", count_raw_rows),
+    ]:
+        start = time.perf_counter()
+        for _ in range(QUERY_REPEATS):
+            query()
+        timings[label] = (time.perf_counter() - start) / QUERY_REPEATS * 1000
+    return timings
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "retention.db")
+        db.connection_manager = ConnectionManager(path, initializer=migrate)
+        worker = RetentionWorker(db.get_connection, chunk_pause=0)
+        worker.enable_incremental_vacuum()
+
+        print(f"Filling {HISTORY_DAYS} days of 1 Hz facial samples...")
+        fill(db.now_ms() - HISTORY_DAYS * SAMPLES_PER_DAY * 1000)
+        with db.get_connection() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+        size_before = file_size(path)
+        latency_before = query_latency()
+
+        start = time.perf_counter()
+        deleted, freed_pages = worker.run_pass()
+        elapsed = time.perf_counter() - start
+        with db.get_connection() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+        size_after = file_size(path)
+        latency_after = query_latency()
+        db.connection_manager.close_all()
+
+    print(f"retention pass: {elapsed:.1f}s, deleted {deleted}, released {freed_pages} pages")
+    print(f"file size: {size_before / 2**20:.1f} MiB -> {size_after / 2**20:.1f} MiB "
+          f"(reclaimed {(size_before - size_after) / 2**20:.1f} MiB)")
+    for label in latency_before:
+        print(f"  {label:<26} {latency_before[label]:8.3f} ms -> {latency_after[label]:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
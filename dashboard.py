@@ -6,7 +6,7 @@ import socket
 # import ctypes
 
 from services.database import (
-    create_user_table,
+    init_database,
 )
 
 def main():
@@ -23,7 +23,7 @@ def main():
     root.minsize(width, height)
 
     # Initialize database
-    create_user_table()
+    init_database()
 
     # Start Splash screen
     SplashScreen(root)
@@ -0,0 +1,118 @@
+from collections import namedtuple
+
+import numpy as np
+
+from engine.keystroke_events import PRESS
+
+
+MAX_KEYCODE = 1024
+NS_PER_MS = 1_000_000
+
+# Totals for the keystrokes captured since the previous drain
+HopStats = namedtuple("HopStats", [
+    "hold_sum_ms", "hold_count", "flight_sum_ms", "flight_count", "key_events", "errors",
+])
+
+
+# INTEGER KEY CODE FOR A PYNPUT KEY (VIRTUAL KEY CODE WHEN AVAILABLE)
+def key_code(key):
+    vk = getattr(key, "vk", None)
+    if vk is None:
+        vk = getattr(getattr(key, "value", None), "vk", None)
+    if vk is None:
+        char = getattr(key, "char", None)
+        vk = ord(char) if char else 0
+    return vk % MAX_KEYCODE
+
+
+# FIXED-SIZE RING OF INT64 VALUES WITH A MONOTONIC WRITE COUNTER
+# One thread writes (append), another reads everything written since its last
+# read (take). The slot is filled before the counter moves, so the reader never
+# sees a half-written value and neither side needs a lock.
+class _Ring:
+    def __init__(self, capacity):
+        self.values = np.zeros(capacity, dtype=np.int64)
+        self.capacity = capacity
+        self.written = 0
+        self.read = 0
+
+    def append(self, value):
+        self.values[self.written % self.capacity] = value
+        self.written += 1
+
+    # (sum, count) OF EVERYTHING APPENDED SINCE THE LAST CALL; OVERWRITTEN VALUES ARE LOST
+    def take_sum(self):
+        end = self.written
+        start = max(self.read, end - self.capacity)
+        self.read = end
+        count = end - start
+        if count == 0:
+            return 0, 0
+        first, last = start % self.capacity, end % self.capacity
+        if first < last or last == 0:
+            total = self.values[first:last or self.capacity].sum()
+        else:
+            total = self.values[first:].sum() + self.values[:last].sum()
+        return int(total), count
+
+
+# PREALLOCATED KEYSTROKE TIMING CAPTURE
+# Press times are kept per integer key code in a NumPy array of perf_counter_ns
+# timestamps; hold and flight durations go into int64 ring buffers. Recording an
+# event is a couple of array stores, and features are computed from vectorized
+# sums over the ring when drained.
+class KeystrokeBuffer:
+    def __init__(self, capacity=8192):
+        self.down_ns = np.zeros(MAX_KEYCODE, dtype=np.int64)
+        self.holds = _Ring(capacity)
+        self.flights = _Ring(capacity)
+        self.last_up_ns = 0
+        self.key_events = 0
+        self.errors = 0
+        self._drained_key_events = 0
+        self._drained_errors = 0
+
+    def press(self, code, timestamp_ns):
+        self.down_ns[code] = timestamp_ns
+        self.key_events += 1
+
+    def release(self, code, timestamp_ns):
+        down = self.down_ns[code]
+        if down:
+            self.holds.append(timestamp_ns - down)
+            self.down_ns[code] = 0
+            if self.last_up_ns:
+                self.flights.append(timestamp_ns - self.last_up_ns)
+            self.last_up_ns = timestamp_ns
+        else:
+            self.errors += 1
+
+    # CONSUMER HANDLER FOR RAW (code, event_type, timestamp_ns) EVENTS
+    def handle_event(self, code, event_type, timestamp_ns):
+        if event_type == PRESS:
+            self.press(code, timestamp_ns)
+        else:
+            self.release(code, timestamp_ns)
+
+    # TOTALS SINCE THE PREVIOUS DRAIN
+    def drain(self):
+        hold_sum, hold_count = self.holds.take_sum()
+        flight_sum, flight_count = self.flights.take_sum()
+        key_events, errors = self.key_events, self.errors
+        stats = HopStats(
+            hold_sum / NS_PER_MS, hold_count,
+            flight_sum / NS_PER_MS, flight_count,
+            key_events - self._drained_key_events,
+            errors - self._drained_errors,
+        )
+        self._drained_key_events, self._drained_errors = key_events, errors
+        return stats
+
+
+# [mean_hold, mean_flight, typing_speed, error_rate] AS THE KEYSTROKE MODEL EXPECTS
+def stats_to_features(stats, duration_minutes):
+    mean_hold = stats.hold_sum_ms / stats.hold_count if stats.hold_count else 0
+    mean_flight = stats.flight_sum_ms / stats.flight_count if stats.flight_count else 0
+    typing_speed = (stats.key_events / (duration_minutes * 60)) * 60
+    error_rate = (stats.errors / stats.key_events) * 100 if stats.key_events > 0 else 0
+    return [mean_hold, mean_flight, typing_speed, error_rate]
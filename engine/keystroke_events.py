@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import deque
+
+
+PRESS = 0
+RELEASE = 1
+
+
+# SINGLE-PRODUCER / SINGLE-CONSUMER RAW KEY EVENT QUEUE
+# The OS hook thread only appends (keycode, event_type, timestamp_ns) tuples;
+# deque.append and deque.popleft are atomic in CPython, so neither side takes a
+# lock. When the consumer has parked because the keyboard went quiet, the
+# producer sets an Event once to wake it.
+class KeystrokeEventQueue:
+    def __init__(self):
+        self._events = deque()
+        self._wakeup = threading.Event()
+        self._parked = False
+
+    def push(self, code, event_type, timestamp_ns):
+        self._events.append((code, event_type, timestamp_ns))
+        if self._parked:
+            self._wakeup.set()
+
+    def pop_all(self):
+        events = self._events
+        batch = []
+        while events:
+            batch.append(events.popleft())
+        return batch
+
+    # BLOCK UNTIL AN EVENT IS PUSHED (OR THE TIMEOUT EXPIRES)
+    def park(self, timeout=None):
+        self._parked = True
+        # Re-check after raising the flag so a push racing with park() is never missed
+        if not self._events:
+            self._wakeup.wait(timeout)
+        self._parked = False
+        self._wakeup.clear()
+
+    def wake(self):
+        self._wakeup.set()
+
+    def __len__(self):
+        return len(self._events)
+
+
+# CONSUMER THREAD: TURNS RAW EVENTS INTO TIMINGS OFF THE HOOK THREAD
+# Every handler is called as handler(code, event_type, timestamp_ns) in event
+# order. While keys are arriving the queue is drained every poll_interval
+# seconds; after idle_after seconds without events the thread parks, with no
+# timeout, until the next push() or stop().
+# `activity` is set after every non-empty batch so other threads can sleep until
+# the user types again.
+class KeystrokeConsumer:
+    def __init__(self, events, handlers, poll_interval=0.02, idle_after=1.0):
+        self.events = events
+        self.handlers = list(handlers)
+        self.poll_interval = poll_interval
+        self.idle_after = idle_after
+        self.activity = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def process_pending(self):
+        batch = self.events.pop_all()
+        for code, event_type, timestamp_ns in batch:
+            for handler in self.handlers:
+                handler(code, event_type, timestamp_ns)
+        if batch:
+            self.activity.set()
+        return len(batch)
+
+    def _run(self):
+        last_event = time.monotonic()
+        while not self._stop.is_set():
+            if self.process_pending():
+                last_event = time.monotonic()
+            elif time.monotonic() - last_event >= self.idle_after:
+                # No timeout: push() wakes a parked consumer, stop() calls wake()
+                self.events.park()
+                continue
+            time.sleep(self.poll_interval)
+        self.process_pending()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="KeystrokeConsumer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=2):
+        self._stop.set()
+        self.events.wake()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
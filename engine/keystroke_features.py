@@ -0,0 +1,180 @@
+import math
+import threading
+import time
+
+import numpy as np
+
+from engine.keystroke_capture import MAX_KEYCODE, NS_PER_MS
+from engine.keystroke_events import PRESS
+
+
+NS_PER_SECOND = 1_000_000_000
+
+# Streams with running (count, mean, M2) statistics in every one-second bucket
+HOLD, FLIGHT, DIGRAPH = 0, 1, 2
+
+# Log-spaced histogram bins (ms) used for the p50/p90 estimates of hold and flight
+HISTOGRAM_BINS = 64
+HISTOGRAM_MIN_MS = 1.0
+HISTOGRAM_MAX_MS = 5000.0
+_LOG_MIN = math.log(HISTOGRAM_MIN_MS)
+_LOG_STEP = (math.log(HISTOGRAM_MAX_MS) - _LOG_MIN) / HISTOGRAM_BINS
+HISTOGRAM_EDGES_MS = np.exp(_LOG_MIN + _LOG_STEP * np.arange(HISTOGRAM_BINS + 1))
+
+# Press-to-press gaps longer than this are pauses, not digraphs
+DIGRAPH_MAX_GAP_MS = 1000.0
+
+FEATURE_NAMES = [
+    "mean_hold_time", "mean_flight_time", "avg_typing_speed", "avg_error_rate",
+    "std_hold_time", "p50_hold_time", "p90_hold_time",
+    "std_flight_time", "p50_flight_time", "p90_flight_time",
+    "mean_digraph_latency", "std_digraph_latency",
+]
+
+
+def _histogram_bin(value_ms):
+    if value_ms <= HISTOGRAM_MIN_MS:
+        return 0
+    return min(int((math.log(value_ms) - _LOG_MIN) / _LOG_STEP), HISTOGRAM_BINS - 1)
+
+
+# WELFORD UPDATE OF A [count, mean, M2] TRIPLE
+def _welford(stats, value):
+    stats[0] += 1
+    delta = value - stats[1]
+    stats[1] += delta / stats[0]
+    stats[2] += delta * (value - stats[1])
+
+
+# QUANTILE FROM A LOG-SPACED HISTOGRAM, INTERPOLATED GEOMETRICALLY WITHIN THE BIN
+def _histogram_quantile(histogram, q):
+    total = histogram.sum()
+    if total == 0:
+        return 0.0
+    cumulative = np.cumsum(histogram)
+    target = q * total
+    index = int(np.searchsorted(cumulative, target))
+    below = cumulative[index - 1] if index else 0
+    fraction = (target - below) / histogram[index]
+    return float(math.exp(_LOG_MIN + _LOG_STEP * (index + fraction)))
+
+
+# ONLINE KEYSTROKE FEATURE ENGINE
+# Fed raw (code, event_type, timestamp_ns) events by the keystroke consumer.
+# Each event updates a preallocated one-second bucket in O(1): Welford
+# (count, mean, M2) for hold, flight and digraph latency, a log-spaced histogram
+# for hold and flight, and key/error counters. feature_vector() merges the
+# buckets of any window (Chan's parallel variance, summed histograms), so any
+# window length up to history_seconds is available on demand without touching
+# raw events. Digraph (press-to-press) statistics per key pair are also kept
+# for the whole session.
+class StreamingFeatures:
+    def __init__(self, history_seconds=3600):
+        self.history_seconds = history_seconds
+        self.bucket_second = np.full(history_seconds, -1, dtype=np.int64)
+        self.stats = np.zeros((history_seconds, 3, 3), dtype=np.float64)
+        self.histograms = np.zeros((history_seconds, 2, HISTOGRAM_BINS), dtype=np.int32)
+        self.key_events = np.zeros(history_seconds, dtype=np.int64)
+        self.errors = np.zeros(history_seconds, dtype=np.int64)
+
+        self.down_ns = np.zeros(MAX_KEYCODE, dtype=np.int64)
+        self.last_up_ns = 0
+        self.last_press_ns = 0
+        self.last_press_code = None
+        self.digraphs = {}
+        self.latest_ns = 0
+        self._lock = threading.Lock()
+
+    def _bucket(self, timestamp_ns):
+        second = timestamp_ns // NS_PER_SECOND
+        slot = second % self.history_seconds
+        if self.bucket_second[slot] != second:
+            self.bucket_second[slot] = second
+            self.stats[slot] = 0
+            self.histograms[slot] = 0
+            self.key_events[slot] = 0
+            self.errors[slot] = 0
+        return slot
+
+    def _add(self, slot, stream, value_ms):
+        _welford(self.stats[slot, stream], value_ms)
+        if stream != DIGRAPH:
+            self.histograms[slot, stream, _histogram_bin(value_ms)] += 1
+
+    def handle_event(self, code, event_type, timestamp_ns):
+        with self._lock:
+            self.latest_ns = max(self.latest_ns, timestamp_ns)
+            slot = self._bucket(timestamp_ns)
+            if event_type == PRESS:
+                self._press(slot, code, timestamp_ns)
+            else:
+                self._release(slot, code, timestamp_ns)
+
+    def _press(self, slot, code, timestamp_ns):
+        self.down_ns[code] = timestamp_ns
+        self.key_events[slot] += 1
+        if self.last_press_ns:
+            gap_ms = (timestamp_ns - self.last_press_ns) / NS_PER_MS
+            if 0 <= gap_ms <= DIGRAPH_MAX_GAP_MS:
+                self._add(slot, DIGRAPH, gap_ms)
+                pair = (self.last_press_code, code)
+                stats = self.digraphs.get(pair)
+                if stats is None:
+                    stats = self.digraphs[pair] = [0, 0.0, 0.0]
+                _welford(stats, gap_ms)
+        self.last_press_ns = timestamp_ns
+        self.last_press_code = code
+
+    def _release(self, slot, code, timestamp_ns):
+        down = self.down_ns[code]
+        if down:
+            self._add(slot, HOLD, (timestamp_ns - down) / NS_PER_MS)
+            self.down_ns[code] = 0
+            if self.last_up_ns:
+                self._add(slot, FLIGHT, (timestamp_ns - self.last_up_ns) / NS_PER_MS)
+            self.last_up_ns = timestamp_ns
+        else:
+            self.errors[slot] += 1
+
+    # FEATURES FOR THE window_seconds ENDING AT end_ns (DEFAULT: NOW ON perf_counter_ns)
+    def feature_vector(self, window_seconds, end_ns=None):
+        if end_ns is None:
+            end_ns = time.perf_counter_ns()
+        end_second = end_ns // NS_PER_SECOND
+        window_seconds = min(int(window_seconds), self.history_seconds)
+        with self._lock:
+            seconds = self.bucket_second
+            mask = (seconds > end_second - window_seconds) & (seconds <= end_second)
+            stats = self.stats[mask]
+            histograms = self.histograms[mask].sum(axis=0)
+            key_events = int(self.key_events[mask].sum())
+            errors = int(self.errors[mask].sum())
+
+        counts = stats[:, :, 0].sum(axis=0)
+        means = np.zeros(3)
+        stds = np.zeros(3)
+        for stream in (HOLD, FLIGHT, DIGRAPH):
+            n = counts[stream]
+            if n:
+                bucket_n, bucket_mean, bucket_m2 = stats[:, stream].T
+                mean = (bucket_n * bucket_mean).sum() / n
+                m2 = bucket_m2.sum() + (bucket_n * (bucket_mean - mean) ** 2).sum()
+                means[stream] = mean
+                stds[stream] = math.sqrt(m2 / n)
+
+        duration_minutes = window_seconds / 60
+        values = [
+            means[HOLD], means[FLIGHT],
+            key_events / duration_minutes if duration_minutes else 0,
+            (errors / key_events) * 100 if key_events > 0 else 0,
+            stds[HOLD], _histogram_quantile(histograms[HOLD], 0.5), _histogram_quantile(histograms[HOLD], 0.9),
+            stds[FLIGHT], _histogram_quantile(histograms[FLIGHT], 0.5), _histogram_quantile(histograms[FLIGHT], 0.9),
+            means[DIGRAPH], stds[DIGRAPH],
+        ]
+        return dict(zip(FEATURE_NAMES, (float(v) for v in values)))
+
+    # MOST FREQUENT KEY PAIRS THIS SESSION: [((first, second), count, mean_ms, std_ms), ...]
+    def top_digraphs(self, n=10):
+        with self._lock:
+            pairs = sorted(self.digraphs.items(), key=lambda item: item[1][0], reverse=True)[:n]
+            return [(pair, count, mean, math.sqrt(m2 / count)) for pair, (count, mean, m2) in pairs]
@@ -0,0 +1,153 @@
+import os
+
+import numpy as np
+
+
+# Samples evaluated together; keeps the (trees x samples) node arrays cache-sized
+CHUNK_SIZE = 1024
+
+
+# RANDOM FOREST FLATTENED INTO NUMPY NODE ARRAYS
+# Every tree's nodes are concatenated into shared arrays (feature, threshold,
+# left/right child, missing-value direction, leaf class probabilities) with one
+# root offset per tree. Leaves point to themselves, so walking all trees for all
+# samples at once is max_depth vectorized steps. Arithmetic follows scikit-learn
+# exactly: inputs are cast to float32 and compared with "<=" against the float64
+# thresholds, and tree probabilities are summed in estimator order before
+# dividing by the number of trees, so labels and probabilities are bit-identical
+# to RandomForestClassifier.predict / predict_proba.
+class FlatForest:
+    ARRAYS = ["feature", "threshold", "left", "right", "missing_left", "leaf_proba", "roots", "classes"]
+
+    def __init__(self, feature, threshold, left, right, missing_left, leaf_proba, roots, classes, max_depth,
+                 feature_names=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.leaf_proba = leaf_proba
+        self.roots = roots
+        self.classes = classes
+        self.max_depth = int(max_depth)
+        self.feature_names = None if feature_names is None else [str(name) for name in feature_names]
+        # Interleaved [left, right] so a step is one gather indexed by 2 * node + went_right
+        self.children = np.column_stack([left, right]).ravel()
+
+    @classmethod
+    def from_sklearn(cls, model):
+        feature, threshold, left, right, missing_left, leaf_proba, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            roots.append(offset)
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            left.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            right.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+            missing = getattr(tree, "missing_go_to_left", None)
+            missing_left.append(np.zeros(tree.node_count, dtype=bool) if missing is None else missing.astype(bool))
+            leaf_proba.append(tree.value[:, 0, :model.n_classes_])
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+        return cls(
+            np.concatenate(feature).astype(np.intp),
+            np.concatenate(threshold).astype(np.float64),
+            np.concatenate(left).astype(np.intp),
+            np.concatenate(right).astype(np.intp),
+            np.concatenate(missing_left),
+            np.concatenate(leaf_proba).astype(np.float64),
+            np.array(roots, dtype=np.intp),
+            np.asarray(model.classes_),
+            max_depth,
+            getattr(model, "feature_names_in_", None),
+        )
+
+    # ONE .npy PER ARRAY; meta.npy IS WRITTEN LAST AND MARKS A COMPLETE EXPORT
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        arrays = {name: getattr(self, name) for name in self.ARRAYS}
+        if self.feature_names is not None:
+            arrays["feature_names"] = np.array(self.feature_names)
+        arrays["meta"] = np.array([self.max_depth], dtype=np.int64)
+        for name, array in arrays.items():
+            path = os.path.join(directory, name + ".npy")
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, array, allow_pickle=False)
+            os.replace(path + ".tmp", path)
+
+    # MEMORY-MAPPED BY DEFAULT: PROCESSES LOADING THE SAME EXPORT SHARE ITS PAGES
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        arrays = [np.load(os.path.join(directory, name + ".npy"), mmap_mode=mmap_mode) for name in cls.ARRAYS]
+        names_path = os.path.join(directory, "feature_names.npy")
+        feature_names = np.load(names_path) if os.path.exists(names_path) else None
+        max_depth = np.load(os.path.join(directory, "meta.npy"))[0]
+        return cls(*arrays, max_depth, feature_names)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    # LEAF NODE REACHED BY EVERY (tree, sample): SHAPE (n_trees, n_samples)
+    def apply(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        has_missing = bool(np.isnan(X).any())
+        flat_X = X.ravel()
+        row_offsets = (np.arange(X.shape[0]) * X.shape[1])[np.newaxis, :]
+        nodes = np.repeat(self.roots[:, np.newaxis], X.shape[0], axis=1)
+        for _ in range(self.max_depth):
+            values = flat_X[row_offsets + self.feature[nodes]]
+            go_left = values <= self.threshold[nodes]
+            if has_missing:
+                go_left = np.where(np.isnan(values), self.missing_left[nodes], go_left)
+            nodes = self.children[2 * nodes + ~go_left]
+        return nodes
+
+    def predict_proba(self, X, chunk_size=CHUNK_SIZE):
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        proba = np.empty((X.shape[0], self.leaf_proba.shape[1]), dtype=np.float64)
+        for start in range(0, X.shape[0], chunk_size):
+            per_tree = self.leaf_proba[self.apply(X[start:start + chunk_size])]
+            # Sequential sum over trees (not pairwise) to match scikit-learn's accumulation order
+            proba[start:start + chunk_size] = np.cumsum(per_tree, axis=0)[-1]
+        proba /= self.n_trees
+        return proba
+
+    # (labels, class probabilities) FROM A SINGLE PASS OVER THE FOREST
+    def predict(self, X):
+        proba = self.predict_proba(X)
+        return self.classes.take(np.argmax(proba, axis=1), axis=0), proba
+
+
+def _export_is_current(model_path, export_dir):
+    meta = os.path.join(export_dir, "meta.npy")
+    return os.path.exists(meta) and os.path.getmtime(meta) >= os.path.getmtime(model_path)
+
+
+# FLAT FOREST FOR A JOBLIB MODEL FILE
+# Uses the memory-mapped NumPy export next to the model when it is up to date.
+# Otherwise the joblib file is loaded (memory-mapped where joblib can), exported
+# for the next start and returned. scikit-learn is only imported in that case.
+def load_flat_forest(model_path, export_dir=None):
+    export_dir = export_dir or os.path.splitext(model_path)[0] + ".flat"
+    if _export_is_current(model_path, export_dir):
+        try:
+            return FlatForest.load(export_dir)
+        except (OSError, ValueError) as e:
+            print(f"keystroke_forest: Ignoring unreadable export {export_dir}: {e}")
+
+    import joblib
+    forest = FlatForest.from_sklearn(joblib.load(model_path, mmap_mode="r"))
+    try:
+        forest.save(export_dir)
+    except OSError as e:
+        print(f"keystroke_forest: Could not write export {export_dir}: {e}")
+    return forest
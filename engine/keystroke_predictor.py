@@ -0,0 +1,121 @@
+from collections import deque, namedtuple
+
+from engine.keystroke_capture import HopStats, stats_to_features
+
+
+BASIC_FEATURES = ['mean_hold_time', 'mean_flight_time', 'avg_typing_speed', 'avg_error_rate']
+
+# One model evaluation over the window ending at end_ns (label is None when the
+# window had fewer than min_keystrokes key presses)
+Prediction = namedtuple("Prediction", ["end_ns", "label", "probability", "key_events"])
+# Share of stressed predictions among the hops of the summary window that had one;
+# emitted once per summary window
+Summary = namedtuple("Summary", ["end_ns", "label", "percentage"])
+
+ZERO_STATS = HopStats(0.0, 0, 0.0, 0, 0, 0)
+
+
+def _add_stats(a, b):
+    return HopStats(*(x + y for x, y in zip(a, b)))
+
+
+def _subtract_stats(a, b):
+    return HopStats(*(x - y for x, y in zip(a, b)))
+
+
+# SLIDING-WINDOW KEYSTROKE STRESS PREDICTION
+# Fed one HopStats per hop (KeystrokeBuffer.drain()) together with the hop's end
+# time. The window totals are running sums: the new hop is added and the hop
+# that fell out of the window subtracted, so each hop costs one model call no
+# matter how long the window is. The summary is the stressed share of the last
+# summary_seconds of hop predictions, maintained the same way; hops without a
+# prediction are left out of it rather than counted as calm. It is returned once
+# every summary_seconds, counted from the last reset, and only when at least
+# min_summary_predictions of those hops had a prediction, so a summary never
+# rests on one or two hops after startup or an idle period. A window with no
+# key presses at all is idle: add_hop returns (None, None), and the caller is
+# expected to reset() and wait for typing, so idle time never reaches the
+# summaries. The predictor never reads the clock, so live capture and recorded
+# sessions drive it alike. window_seconds == hop_seconds gives tumbling windows.
+class SlidingWindowPredictor:
+    def __init__(self, get_model, window_seconds=60, hop_seconds=6, summary_seconds=60,
+                 min_keystrokes=8, feature_source=None, min_summary_predictions=None):
+        self.get_model = get_model
+        self.hop_seconds = hop_seconds
+        self.window_hops = max(1, round(window_seconds / hop_seconds))
+        self.summary_hops = max(1, round(summary_seconds / hop_seconds))
+        self.min_keystrokes = min_keystrokes
+        # Default: half of the summary window's hops
+        self.min_summary_predictions = min_summary_predictions or max(1, self.summary_hops // 2)
+        # Optional feature_source(window_seconds, end_ns) -> {name: value} for models
+        # trained on more than the basic four features
+        self.feature_source = feature_source
+
+        self.hops = deque()
+        self.totals = ZERO_STATS
+        self.labels = deque()
+        self.stressed = 0
+        self.predicted = 0
+        self.hops_since_summary = 0
+
+    @property
+    def window_seconds(self):
+        return len(self.hops) * self.hop_seconds
+
+    @property
+    def is_idle(self):
+        return self.totals.key_events == 0
+
+    # FORGET THE WINDOW AND THE SUMMARY HISTORY (AFTER AN IDLE PERIOD)
+    def reset(self):
+        self.hops.clear()
+        self.totals = ZERO_STATS
+        self.labels.clear()
+        self.stressed = 0
+        self.predicted = 0
+        self.hops_since_summary = 0
+
+    def _model_inputs(self, model, end_ns):
+        names = model.feature_names or BASIC_FEATURES
+        basic = stats_to_features(self.totals, self.window_seconds / 60)
+        if names == BASIC_FEATURES or self.feature_source is None:
+            return basic
+        vector = self.feature_source(self.window_seconds, end_ns)
+        return [vector[name] for name in names]
+
+    def _predict(self, end_ns):
+        key_events = self.totals.key_events
+        if key_events < self.min_keystrokes:
+            return Prediction(end_ns, None, None, key_events)
+        model = self.get_model()
+        labels, probabilities = model.predict([self._model_inputs(model, end_ns)])
+        return Prediction(end_ns, int(labels[0]), float(probabilities[0][1]), key_events)
+
+    def _summarize(self, prediction):
+        self.labels.append(prediction.label)
+        self.stressed += int(prediction.label == 1)
+        self.predicted += prediction.label is not None
+        if len(self.labels) > self.summary_hops:
+            expired = self.labels.popleft()
+            self.stressed -= int(expired == 1)
+            self.predicted -= expired is not None
+        self.hops_since_summary += 1
+        if self.hops_since_summary < self.summary_hops:
+            return None
+        self.hops_since_summary = 0
+        if self.predicted < self.min_summary_predictions:
+            return None
+        percentage = (self.stressed / self.predicted) * 100
+        return Summary(prediction.end_ns, 1 if percentage >= 50 else 0, percentage)
+
+    # ADD ONE HOP; RETURNS (Prediction, Summary or None), OR (None, None) WHEN IDLE
+    def add_hop(self, stats, end_ns):
+        self.hops.append(stats)
+        self.totals = _add_stats(self.totals, stats)
+        if len(self.hops) > self.window_hops:
+            self.totals = _subtract_stats(self.totals, self.hops.popleft())
+        if self.is_idle:
+            return None, None
+
+        prediction = self._predict(end_ns)
+        return prediction, self._summarize(prediction)
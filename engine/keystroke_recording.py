@@ -0,0 +1,104 @@
+import os
+import threading
+
+import numpy as np
+
+from engine.keystroke_capture import KeystrokeBuffer
+from engine.keystroke_features import StreamingFeatures, NS_PER_SECOND
+from engine.keystroke_predictor import SlidingWindowPredictor
+
+
+# Raw key events as fixed-width little-endian records after an 8-byte header:
+# perf_counter_ns timestamp, key code, PRESS/RELEASE
+EVENT_DTYPE = np.dtype([("t", "<i8"), ("code", "<u2"), ("type", "u1")])
+MAGIC = b"WMKS\x01\x00\x00\x00"
+
+
+# KEY EVENT RECORDER
+# Registered as a keystroke consumer handler. Events are copied into a
+# preallocated structured array and appended to the file a block at a time, so
+# recording costs the consumer one record store per event.
+class KeystrokeRecorder:
+    def __init__(self, path, block_size=4096):
+        self.path = path
+        self._block = np.zeros(block_size, dtype=EVENT_DTYPE)
+        self._count = 0
+        self._lock = threading.Lock()
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "ab")
+        if new_file:
+            self._file.write(MAGIC)
+
+    def handle_event(self, code, event_type, timestamp_ns):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._block[self._count] = (timestamp_ns, code, event_type)
+            self._count += 1
+            if self._count == len(self._block):
+                self._write_block()
+
+    def _write_block(self):
+        self._file.write(self._block[:self._count].tobytes())
+        self._count = 0
+
+    def flush(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._write_block()
+            self._file.flush()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._file.close()
+
+
+# RECORDED EVENTS AS A READ-ONLY MEMORY MAP (NOTHING IS READ UP FRONT)
+def load_recording(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a keystroke recording")
+    if os.path.getsize(path) == len(MAGIC):
+        return np.zeros(0, dtype=EVENT_DTYPE)
+    return np.memmap(path, dtype=EVENT_DTYPE, mode="r", offset=len(MAGIC))
+
+
+# REPLAY A RECORDING THROUGH THE LIVE FEATURE AND PREDICTION PATH
+# Events go to a KeystrokeBuffer and StreamingFeatures exactly as the consumer
+# would deliver them, and the predictor is stepped at every hop boundary in
+# event time, with the same idle handling as predict_and_store: once a window
+# is empty the predictor is reset and the next hop starts at the next key.
+# Runs as fast as the CPU allows. Yields (Prediction, Summary or None) per hop.
+def replay_session(events, get_model, window_seconds=60, hop_seconds=6, summary_seconds=60,
+                   min_keystrokes=8, chunk_size=65536):
+    capture = KeystrokeBuffer()
+    features = StreamingFeatures()
+    predictor = SlidingWindowPredictor(
+        get_model, window_seconds, hop_seconds, summary_seconds, min_keystrokes,
+        feature_source=features.feature_vector,
+    )
+    hop_ns = int(hop_seconds * NS_PER_SECOND)
+    next_hop = None
+
+    for start in range(0, len(events), chunk_size):
+        chunk = events[start:start + chunk_size]
+        for timestamp_ns, code, event_type in zip(chunk["t"].tolist(), chunk["code"].tolist(), chunk["type"].tolist()):
+            if next_hop is None:
+                next_hop = timestamp_ns + hop_ns
+            while timestamp_ns >= next_hop:
+                prediction, summary = predictor.add_hop(capture.drain(), next_hop)
+                if predictor.is_idle:
+                    predictor.reset()
+                    next_hop = timestamp_ns + hop_ns
+                    break
+                yield prediction, summary
+                next_hop += hop_ns
+            capture.handle_event(code, event_type, timestamp_ns)
+            features.handle_event(code, event_type, timestamp_ns)
+
+    if next_hop is not None:
+        prediction, summary = predictor.add_hop(capture.drain(), next_hop)
+        if not predictor.is_idle:
+            yield prediction, summary
@@ -1,24 +1,18 @@
 from services.database import (
-    create_connection,
-    create_recommendations_log_table,
+    get_connection,
     insert_recommendation_log,
-    update_recommendation_feedback,
-    set_recommendation_score
+    record_recommendation_feedback
 )
 
-# ✅ Ensure the table is created at the beginning
-create_recommendations_log_table()
-
 
 def has_been_shown(rec_id):
     try:
-        conn = create_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT 1 FROM recommendations_log WHERE recommendation_id = ?
-        """, (rec_id,))
-        result = cursor.fetchone()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT 1 FROM recommendations_log WHERE recommendation_id = ?
+            """, (rec_id,))
+            result = cursor.fetchone()
         return result is not None
     except Exception as e:
         print(f"[ERROR] has_been_shown: {e}")
@@ -27,13 +21,12 @@ def has_been_shown(rec_id):
 
 def was_disliked(rec_id):
     try:
-        conn = create_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT feedback FROM recommendations_log WHERE recommendation_id = ?
-        """, (rec_id,))
-        row = cursor.fetchone()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT feedback FROM recommendations_log WHERE recommendation_id = ?
+            """, (rec_id,))
+            row = cursor.fetchone()
         return row is not None and row[0] == 0
     except Exception as e:
         print(f"[ERROR] was_disliked: {e}")
@@ -49,8 +42,7 @@ def save_recommendation(rec_id):
 
 def update_feedback(rec_id, feedback):
     try:
-        update_recommendation_feedback(rec_id, feedback)
-        set_recommendation_score(rec_id, bool(feedback))
+        record_recommendation_feedback(rec_id, feedback)
 
     except Exception as e:
         print(f"[ERROR] update_feedback: {e}")
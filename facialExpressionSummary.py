@@ -1,4 +1,4 @@
-from services.database import get_latest_facial_expression_data,get_latest_keystroke_data
+from services.database import get_latest_facial_expression_data,get_latest_keystroke_data,store_facial_expression_summary,now_ms
 from datetime import datetime
 import time
 from recommendations import start_recommendation
@@ -14,9 +14,12 @@ def calculate_facial_expression_summary():
     ''')
     while True:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        window_end = now_ms()
 
-        facial_value = get_latest_facial_expression_data(duration, timestamp)
-        keystroke_value = get_latest_keystroke_data(duration,timestamp=timestamp)
+        facial_value = get_latest_facial_expression_data(duration, window_end)
+        if facial_value is not None:
+            store_facial_expression_summary(facial_value)
+        keystroke_value = get_latest_keystroke_data(duration,timestamp=window_end)
 
         print(f"Timestamp: {timestamp} - Overall Facial Stress Value: {facial_value}")
         print(f"Timestamp: {timestamp} - Overall Keystroke Stress Value: {keystroke_value}")
@@ -5,82 +5,63 @@ os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'  # 0 = all logs, 1 = filter INFO, 2 = +
 
 import cv2
 import numpy as np
-import tensorflow as tf
 import time
 from collections import deque
 # import db_manager  # You must have this file with your DB models
 import multiprocessing
 from multiprocessing import Process, Manager
-from tensorflow.keras.models import load_model
 
 import services.database as db
+from vision.capture_profiles import get_capture_profile, open_capture
+from vision.face_batch import FaceBatch
+from vision.face_tracker import FaceTracker
+from vision.frame_grabber import FrameGrabber
+from vision.inference_backends import load_backend
 
 
 def facial_expression_monitoring():
 
-    # Make sure this class is available before loading
-    class CBAM(tf.keras.layers.Layer):
-        def __init__(self, reduction_ratio=8, **kwargs):  # <-- ADD **kwargs
-            super(CBAM, self).__init__(**kwargs)          # <-- PASS **kwargs
-            self.reduction_ratio = reduction_ratio
-
-        def build(self, input_shape):
-            channels = input_shape[-1]
-            self.channel_attention = tf.keras.Sequential([
-                tf.keras.layers.GlobalAveragePooling2D(),
-                tf.keras.layers.Dense(channels // self.reduction_ratio, activation='relu'),
-                tf.keras.layers.Dense(channels, activation='sigmoid')
-            ])
-            self.spatial_attention = tf.keras.layers.Conv2D(1, (7, 7), padding='same', activation='sigmoid')
-
-        def call(self, inputs):
-            avg_pool = tf.reduce_mean(inputs, axis=[1, 2], keepdims=True)
-            channel_att = self.channel_attention(avg_pool)
-            channel_refined = tf.keras.layers.Multiply()([inputs, channel_att])
-            spatial_att = self.spatial_attention(channel_refined)
-            return tf.keras.layers.Multiply()([channel_refined, spatial_att])
     # Now load the model
     print(" Loading model...")
-    #model = load_model('models/sequential_model.h5')
-    model = load_model('models/sequential_model_improved.h5')
-    # model = load_model('models/sequential_model_improved.h5', compile=False)
-
-    #model = load_model('models/cbam_cnn_stress_detection.h5', custom_objects={'CBAM': CBAM})
-    #model = load_model('models/cbam_cnn_stress_detection_improved.h5', custom_objects={'CBAM': CBAM})
-
-
-
-    # # Load trained model
-    # model = tf.keras.models.load_model('models/cbam_cnn_stress_detection.h5')
+    # NumPy, TFLite, tf.function or Keras, chosen with WELLMIND_FACIAL_BACKEND; only the
+    # TensorFlow ones import it (custom layers such as CBAM are registered there)
+    model = load_backend('models/sequential_model_improved.h5')
+    #model = load_backend('models/sequential_model.h5')
+    #model = load_backend('models/cbam_cnn_stress_detection.h5')
+    #model = load_backend('models/cbam_cnn_stress_detection_improved.h5')
+    print(f" Inference backend: {model.name}")
 
     # Load Haar cascade
     #face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
     face_cascade = cv2.CascadeClassifier('haarcascades/haarcascade_frontalface_default.xml')
 
-    print(" Opening webcam...")
-    # Initialize webcam
-    cap = cv2.VideoCapture(0)
-    cap.set(cv2.CAP_PROP_FPS, 30)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+    # Every (re)open applies the active capture profile
+    profile = get_capture_profile()
+
+    def open_camera():
+        return open_capture(profile)
+
+    print(f" Opening webcam ({profile.name}: {profile.width}x{profile.height} @ {profile.fps} FPS)...")
+    # Frames are grabbed on their own thread; only the ones analysed get decoded
+    grabber = FrameGrabber(open_camera)
+    grabber.start()
 
     print(" Starting detection loop...")
     # Stress detection parameters
     WINDOW_SIZE = 10
-    stress_queue = deque(maxlen=WINDOW_SIZE)
     STRESS_THRESHOLD = 0.5
-
-    def preprocess_face(frame):
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30), flags=cv2.CASCADE_SCALE_IMAGE)
-        if len(faces) == 0:
-            return None
-        (x, y, w, h) = faces[0]
-        face = gray[y:y + h, x:x + w]
-        face = cv2.resize(face, (48, 48))
-        face = face.astype('float32') / 255.0
-        face = np.expand_dims(face, axis=(0, -1))
-        return face
+    # Faces tracked per frame (shared rooms, pair programming) and analysed frames
+    # gathered before one batched model call; 1 predicts every frame as it comes
+    MAX_FACES = 4
+    FRAMES_PER_BATCH = 1
+    # Stress window per face track; the largest face at detection (the person at
+    # the workstation) is the one stored
+    stress_queues = {}
+    primary = None
+
+    # Full-frame detection every few frames, a search around each face in between
+    tracker = FaceTracker(face_cascade, max_faces=MAX_FACES)
+    batch = FaceBatch(MAX_FACES * FRAMES_PER_BATCH)
 
     with Manager() as manager:
         stress_list = manager.list()
@@ -93,49 +74,82 @@ def facial_expression_monitoring():
 
         # Real-time detection loop
         last_capture = time.time()
+        batched_frames = 0
         while True:
             if db.monitoring_facial_expression() == False:
-                cap.release()
-                continue
-            else:
-                if not (cap.isOpened()):
-                    cap = cv2.VideoCapture(0)
-                    cap.set(cv2.CAP_PROP_FPS, 30)
-                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-
-            ret, frame = cap.read()
+                grabber.stop()
+                tracker.reset()
+                batch.clear()
+                batched_frames = 0
+                # Sleep until monitoring is switched back on instead of spinning
+                db.wait_for_facial_monitoring()
+
+            if get_capture_profile() is not profile:
+                profile = get_capture_profile()
+                print(f" Switching capture profile to {profile.name}")
+                grabber.stop()
+                tracker.reset()
+
+            if not grabber.is_running:
+                grabber.start()
+
+            # Sleep until the next analysis is due instead of reading frames to discard
+            time.sleep(max(0.0, last_capture + profile.analysis_interval - time.time()))
+
+            ret, frame = grabber.read()
             if not ret:
                 break
             current_time = time.time()
 
-            if current_time - last_capture >= 1:  # Every 1s
-                face = preprocess_face(frame)
-                if face is not None:
-                    prediction = model.predict(face)[0][0]
-                    stress_queue.append(prediction)
-                    stress_list.append(prediction)
-                    last_capture = current_time
-
-                    if len(stress_queue) == WINDOW_SIZE:
+            if current_time - last_capture >= profile.analysis_interval:
+                # The cadence holds whether or not a face is found, so an empty
+                # room is not scanned at the camera's frame rate
+                last_capture = current_time
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                tracks = tracker.detect_tracks(gray)
+                if tracks:
+                    for track_id, box in tracks:
+                        batch.add(gray, box, track_id)
+                    primary = tracks[0][0]
+                    batched_frames += 1
+
+                if batched_frames == FRAMES_PER_BATCH:
+                    batched_frames = 0
+                    predictions = batch.predict(model)
+                    for track_id, prediction in predictions:
+                        stress_queues.setdefault(track_id, deque(maxlen=WINDOW_SIZE)).append(prediction)
+                        if track_id == primary:
+                            stress_list.append(prediction)
+
+                    # Forget faces the tracker has not seen for a while
+                    known = tracker.known_track_ids()
+                    for track_id in list(stress_queues):
+                        if track_id not in known:
+                            del stress_queues[track_id]
+
+                    for track_id in dict.fromkeys(track_id for track_id, _ in predictions):
+                        stress_queue = stress_queues.get(track_id, ())
+                        if len(stress_queue) < WINDOW_SIZE:
+                            continue
                         stress_percentage = np.mean(stress_queue)
-                        print(f"Stress Percentage: {stress_percentage:.2f}")
+                        print(f"Face {track_id} Stress Percentage: {stress_percentage:.2f}")
 
-                        db.store_facial_expression_data(round(float(stress_percentage)*100, 2))
+                        if track_id == primary:
+                            db.store_facial_expression_data(round(float(stress_percentage)*100, 2))
 
 
                         ### Store stress data in the database using user_id variable and current stress_presentage
 
                         if stress_percentage > STRESS_THRESHOLD:
-                            print("Stress Alert: High stress detected!")
+                            print(f"Stress Alert: High stress detected (face {track_id})!")
                         else:
-                            print("Stress level: Normal")
+                            print(f"Stress level: Normal (face {track_id})")
 
             #cv2.imshow('Webcam', frame)
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
 
-        cap.release()
+        grabber.stop()
         cv2.destroyAllWindows()
         # plot_process.terminate()
 
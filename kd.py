@@ -1,3 +1,4 @@
+import sys
 import threading
 from pynput import keyboard
 import keystroke
@@ -6,6 +7,11 @@ import keystroke
 if __name__ == "__main__":
     print("Starting keystroke capture. Press PauseBreak to stop.")
 
+    # Optional: python kd.py session.wmks records the raw key events for replay
+    if len(sys.argv) > 1:
+        keystroke.start_recording(sys.argv[1])
+        print(f"Recording key events to {sys.argv[1]}")
+
     pred_thread = threading.Thread(target=keystroke.predict_and_store, daemon=True)
     pred_thread.start()
 
@@ -1,146 +1,100 @@
+import atexit
 import time
 import threading
 from pynput import keyboard
-import numpy as np
-import joblib
-import sqlite3
 from datetime import datetime
-import pandas as pd
-
-
-model = joblib.load('models/keystroke/random_forest_stress_model.joblib')
-
-key_down_times = {}
-hold_times = []
-flight_times = []
-last_key_up_time = None
-error_count = 0
-key_events_count = 0
-
-lock = threading.Lock()
+import services.database as db
+from engine.keystroke_capture import KeystrokeBuffer, key_code
+from engine.keystroke_events import PRESS, RELEASE, KeystrokeConsumer, KeystrokeEventQueue
+from engine.keystroke_features import StreamingFeatures
+from engine.keystroke_forest import load_flat_forest
+from engine.keystroke_predictor import SlidingWindowPredictor
+from engine.keystroke_recording import KeystrokeRecorder
+
+
+MODEL_PATH = 'models/keystroke/random_forest_stress_model.joblib'
+
+# The forest is loaded on the first prediction, as memory-mapped flat NumPy
+# arrays (label and probability in one vectorized pass)
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = load_flat_forest(MODEL_PATH)
+    return _model
+
+# The pynput callbacks only timestamp the key and append it to the event queue;
+# the consumer thread is the single writer of the preallocated timing capture
+events = KeystrokeEventQueue()
+capture = KeystrokeBuffer()
+feature_engine = StreamingFeatures()
+consumer = KeystrokeConsumer(events, [capture.handle_event, feature_engine.handle_event])
+
+# RECORD RAW KEY EVENTS TO A FILE (SEE engine/keystroke_recording.py FOR REPLAY)
+def start_recording(path):
+    recorder = KeystrokeRecorder(path)
+    consumer.handlers.append(recorder.handle_event)
+    atexit.register(recorder.close)
+    return recorder
 
 def on_press(key):
-    global key_down_times, key_events_count
-    try:
-        k = key.char
-    except AttributeError:
-        k = str(key)
-
-    with lock:
-        key_down_times[k] = time.time()
-        key_events_count += 1
+    events.push(key_code(key), PRESS, time.perf_counter_ns())
 
 def on_release(key):
-    global hold_times, flight_times, last_key_up_time, error_count
-    try:
-        k = key.char
-    except AttributeError:
-        k = str(key)
-
-    now = time.time()
-
-    with lock:
-        if k in key_down_times:
-            hold_time = (now - key_down_times[k]) * 1000
-            hold_times.append(hold_time)
-            del key_down_times[k]
-
-            if last_key_up_time is not None:
-                flight_time = (now - last_key_up_time) * 1000
-                flight_times.append(flight_time)
-            last_key_up_time = now
-        else:
-            error_count += 1
-
+    events.push(key_code(key), RELEASE, time.perf_counter_ns())
 
     if key == keyboard.Key.pause:
         return False
 
 
-def calculate_features(duration_minutes=2):
-    global error_count, key_events_count
-
-    with lock:
-        ht = hold_times.copy()
-        ft = flight_times.copy()
-        ec = error_count
-        kc = key_events_count
-        hold_times.clear()
-        flight_times.clear()
-
-    mean_hold = np.mean(ht) if ht else 0
-    mean_flight = np.mean(ft) if ft else 0
-    typing_speed = (kc / (duration_minutes * 60)) * 60
-    error_rate = (ec / kc) * 100 if kc > 0 else 0
-
-    with lock:
-        error_count = 0
-        key_events_count = 0
-
-    return [mean_hold, mean_flight, typing_speed, error_rate]
-
-def predict_and_store():
-    conn_thread = sqlite3.connect('databases/wellmind.db', check_same_thread=False)
-    cursor_thread = conn_thread.cursor()
-    cursor_thread.execute('''
-        CREATE TABLE IF NOT EXISTS keystroke_summary (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT NOT NULL,
-            stress_label INTEGER NOT NULL,
-            stress_percentage REAL NOT NULL
-        )
-    ''')
-    conn_thread.commit()
-
-    feature_names = ['mean_hold_time', 'mean_flight_time', 'avg_typing_speed', 'avg_error_rate']
-    MIN_KEYSTROKES = 8
-    interval_minutes = 0.1 #2
-    summary_window = 1  # in minutes #20
-    max_intervals = summary_window // interval_minutes
-
-    predictions = []
-    while True:
-        time.sleep(interval_minutes * 60)
-
-        features = calculate_features(duration_minutes=interval_minutes)
-        total_keys = int((features[2] * (interval_minutes * 60)) / 60)
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-        if total_keys < MIN_KEYSTROKES:
-            print(f"[{timestamp}] Skipped: not enough keystrokes ({total_keys} pressed)")
-            predictions.append(None)
-
-        else:
-
-            features_df = pd.DataFrame([features], columns=feature_names)
-
-            pred_label = model.predict(features_df)[0]
-
-            pred_prob = model.predict_proba(features_df)[0][1]
-
-            predictions.append(pred_label)
+# Sliding window: each prediction covers WINDOW_SECONDS and one is made every HOP_SECONDS;
+# the stored summary is the stressed share of the predictions of the last SUMMARY_SECONDS.
+# Hops without enough keystrokes store nothing, and the loop sleeps through idle periods.
+WINDOW_SECONDS = 60
+HOP_SECONDS = 6
+SUMMARY_SECONDS = 60
+MIN_KEYSTROKES = 8
 
-            print(f"[{timestamp}] 2-min Prediction: {pred_label} (stress prob: {pred_prob:.2f})")
+def predict_and_store(window_seconds=WINDOW_SECONDS, hop_seconds=HOP_SECONDS, summary_seconds=SUMMARY_SECONDS):
+    predictor = SlidingWindowPredictor(
+        get_model, window_seconds, hop_seconds, summary_seconds, MIN_KEYSTROKES,
+        feature_source=feature_engine.feature_vector,
+    )
 
-         # If 20 minutes (10 intervals) passed
+    consumer.start()
+    capture.drain()
 
-        if len(predictions) == max_intervals:
-
-            stress_count = sum(1 for p in predictions if p == 1)
-
-            stress_percentage = (stress_count / max_intervals) * 100
-            majority_label = 1 if stress_percentage >= 50 else 0
+    next_hop = time.monotonic() + hop_seconds
+    while True:
+        time.sleep(max(0, next_hop - time.monotonic()))
+        next_hop += hop_seconds
 
-            summary_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            print(f"[{summary_timestamp}] 🔍 20-min Summary → Stress %: {stress_percentage:.1f}%, Label: {majority_label}")
+        # Cleared before draining so a key processed after the drain still wakes us
+        consumer.activity.clear()
+        prediction, summary = predictor.add_hop(capture.drain(), time.perf_counter_ns())
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-            cursor_thread.execute(
-                'INSERT INTO keystroke_summary (timestamp, stress_label, stress_percentage) VALUES (?, ?, ?)',
-                (summary_timestamp, majority_label, stress_percentage)
-            )
-            conn_thread.commit()
+        if predictor.is_idle:
+            # No key presses in the whole window: park until the user types again.
+            # Idle time is neither predicted nor summarized.
+            print(f"[{timestamp}] Idle: no keystrokes for {predictor.window_seconds}s, waiting for typing")
+            predictor.reset()
+            consumer.activity.wait()
+            next_hop = time.monotonic() + hop_seconds
+            continue
+
+        if prediction.label is None:
+            print(f"[{timestamp}] Skipped: not enough keystrokes ({prediction.key_events} pressed in {predictor.window_seconds}s)")
+        else:
+            print(f"[{timestamp}] {predictor.window_seconds}s Prediction: {prediction.label} (stress prob: {prediction.probability:.2f})")
 
-            predictions.clear()  # reset for next 20-min block
+        if summary is not None:
+            print(f"[{timestamp}] 🔍 {summary_seconds}s Summary → Stress %: {summary.percentage:.1f}%, Label: {summary.label}")
+            db.store_keystroke_summary(summary.label, summary.percentage)
 
 
 
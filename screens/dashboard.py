@@ -4,8 +4,9 @@ import os
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.pyplot as plt
 from components.profile_popup import ProfilePopup
-from datetime import datetime
-from services.database import fetch_latest_user
+from datetime import datetime, timedelta
+from services.database import fetch_latest_user, get_stress_series, get_stress_overview, get_current_stress, now_ms, to_epoch_ms, from_epoch_ms
+from services.rollups import OVERALL
 
 class DashboardScreen(ctk.CTkFrame):
     def __init__(self, parent, controller):
@@ -95,10 +96,11 @@ class DashboardScreen(ctk.CTkFrame):
         card_frame = ctk.CTkFrame(self.scrollable_frame, fg_color="#333333", corner_radius=12)
         card_frame.pack(fill=ctk.X, padx=25, pady=(0, 10))
 
+        current_stress, average_stress, peak_stress = self.get_stress_cards()
         for title, value in [
-            ("Current Stress", "68%"),
-            ("Average Stress", "54%"),
-            ("Peak Stress", "85% (Thursday, 2:45 PM)"),
+            ("Current Stress", current_stress),
+            ("Average Stress", average_stress),
+            ("Peak Stress", peak_stress),
         ]:
             card = ctk.CTkFrame(card_frame, corner_radius=12, width=140, height=100, fg_color="#E3F2FD")
             card.pack(side="left", padx=10, pady=10, fill="both", expand=True)
@@ -145,8 +147,9 @@ class DashboardScreen(ctk.CTkFrame):
         graph_frame = ctk.CTkFrame(graph_card, fg_color="white", corner_radius=10)
         graph_frame.pack(fill=ctk.BOTH, expand=True, padx=20, pady=10)
 
+        days, day_values = self.get_week_stress()
         fig, ax = plt.subplots(figsize=(6, 2.5))
-        ax.plot(["Mon", "Tue", "Wed", "Thu", "Fri"], [60, 70, 65, 80, 55], marker="o", color="#3F51B5")
+        ax.plot(days, day_values, marker="o", color="#3F51B5")
         ax.set_ylabel("% Stress")
         ax.set_ylim(0, 100)
         ax.grid(True)
@@ -280,6 +283,31 @@ class DashboardScreen(ctk.CTkFrame):
         ctk.CTkLabel(self.scrollable_frame, text="WellMind V.1.0.0.1\nAll Rights Reserved © 2025",
                      font=ctk.CTkFont("Poppins", 12), text_color="#AAA").pack(pady=(0, 10))
 
+    def get_week_start(self):
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        return today - timedelta(days=today.weekday())
+
+    def get_stress_cards(self):
+        current = get_current_stress(OVERALL)
+        overview = get_stress_overview(OVERALL, to_epoch_ms(self.get_week_start()), now_ms())
+
+        current_text = f"{current:.0f}%" if current is not None else "--"
+        if overview is None:
+            return current_text, "--", "--"
+        peak_time = from_epoch_ms(overview["peak_timestamp"]).strftime("%A, %I:%M %p").replace(" 0", " ")
+        return current_text, f"{overview['mean']:.0f}%", f"{overview['max']:.0f}% ({peak_time})"
+
+    def get_week_stress(self):
+        week_start = self.get_week_start()
+        days = [(week_start + timedelta(days=i)).strftime("%a") for i in range(7)]
+        values = [None] * 7
+        week_end = week_start + timedelta(days=7)
+        for bucket in get_stress_series(OVERALL, to_epoch_ms(week_start), to_epoch_ms(week_end), points=7):
+            day_index = (from_epoch_ms(bucket["bucket_start"]).date() - week_start.date()).days
+            if 0 <= day_index < 7:
+                values[day_index] = bucket["mean"]
+        return days, [float("nan") if v is None else v for v in values]
+
     def get_greeting(self):
         hour = datetime.now().hour
         if 5 <= hour < 12:
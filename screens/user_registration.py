@@ -6,7 +6,6 @@ import datetime
 from tkinter import messagebox
 from screens.dashboard import DashboardScreen
 from services.database import (
-    create_user_table,
     insert_user,
 )
 
@@ -265,9 +264,6 @@ class UserRegistrationScreen(ctk.CTkFrame):
 
         gender = self.gender_combobox.get()
 
-        # Create necessary tables
-        create_user_table()
-
         # Insert user into database
         insert_user(
             first_name,
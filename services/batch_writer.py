@@ -0,0 +1,120 @@
+import queue
+import threading
+import time
+
+from services.connection_manager import retry_on_busy
+
+
+_STOP = object()
+
+
+# GROUP-COMMIT WRITER
+# Producers enqueue (sql, params) rows without ever touching the disk. A
+# background thread drains the queue and writes the rows with executemany()
+# in a single transaction once max_batch_size rows are pending or
+# flush_interval seconds have passed since the oldest pending row.
+# Rows are grouped per SQL statement (one executemany() each); rows of the same
+# statement keep their order, so only enqueue statements that commute with each
+# other (plain inserts, additive upserts).
+# An optional on_commit callback runs on the writer thread once the rows it came
+# with are committed, and never if the batch is dropped, so in-memory state that
+# mirrors the database only changes after the write is durable.
+class BatchWriter:
+    def __init__(self, get_connection, max_batch_size=200, flush_interval=1.0):
+        self.get_connection = get_connection
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                thread = threading.Thread(target=self._run, name="BatchWriter", daemon=True)
+                thread.start()
+                self._thread = thread
+
+    # NON-BLOCKING: NEVER WAITS ON SQLITE
+    def enqueue(self, sql, params, on_commit=None):
+        self._ensure_started()
+        self._queue.put(([(sql, params)], on_commit))
+
+    # ENQUEUE SEVERAL (sql, params) ROWS THAT MUST COMMIT IN THE SAME TRANSACTION
+    def enqueue_many(self, statements, on_commit=None):
+        self._ensure_started()
+        self._queue.put((list(statements), on_commit))
+
+    # BLOCK UNTIL EVERYTHING ENQUEUED SO FAR IS COMMITTED
+    def flush(self, timeout=None):
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    # FLUSH PENDING ROWS AND STOP THE WRITER THREAD
+    def stop(self, timeout=10):
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        batch, callbacks = [], []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is None:
+                pass
+            elif item is _STOP:
+                self._write(batch, callbacks)
+                return
+            elif isinstance(item, threading.Event):
+                self._write(batch, callbacks)
+                batch, callbacks, deadline = [], [], None
+                item.set()
+                continue
+            else:
+                rows, on_commit = item
+                batch.extend(rows)
+                if on_commit is not None:
+                    callbacks.append(on_commit)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch and (len(batch) >= self.max_batch_size or time.monotonic() >= deadline):
+                self._write(batch, callbacks)
+                batch, callbacks, deadline = [], [], None
+
+    def _write(self, batch, callbacks=()):
+        if not batch:
+            return
+        try:
+            self._commit(batch)
+        except Exception as e:
+            print(f"[ERROR] BatchWriter dropped {len(batch)} rows: {e}")
+            return
+        for on_commit in callbacks:
+            try:
+                on_commit()
+            except Exception as e:
+                print(f"[ERROR] BatchWriter on_commit callback failed: {e}")
+
+    @retry_on_busy()
+    def _commit(self, batch):
+        statements = {}
+        for sql, params in batch:
+            statements.setdefault(sql, []).append(params)
+        with self.get_connection() as conn:
+            for sql, rows in statements.items():
+                conn.executemany(sql, rows)
@@ -0,0 +1,176 @@
+import sqlite3
+import threading
+import queue
+import time
+import functools
+import weakref
+from contextlib import contextmanager
+
+
+# RETRY A DATABASE CALL WHEN SQLITE REPORTS THE FILE IS BUSY OR LOCKED
+# busy_timeout already makes SQLite wait for the lock; this covers the cases
+# where SQLite gives up immediately (e.g. a reader upgrading to a writer).
+_busy_retries = 0
+_busy_retries_lock = threading.Lock()
+
+def is_busy_error(error):
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+def get_busy_retry_count():
+    return _busy_retries
+
+def retry_on_busy(retries=5, delay=0.05):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            global _busy_retries
+            for attempt in range(retries + 1):
+                try:
+                    return func(*args, **kwargs)
+                except sqlite3.OperationalError as e:
+                    if attempt == retries or not is_busy_error(e):
+                        raise
+                    with _busy_retries_lock:
+                        _busy_retries += 1
+                    time.sleep(delay * (2 ** attempt))
+        return wrapper
+    return decorator
+
+
+# HOLDS A THREAD'S CONNECTION IN THREAD-LOCAL STORAGE; PYTHON DROPS IT WHEN THE
+# THREAD EXITS, WHICH CLOSES THE CONNECTION (SEE ConnectionManager.thread_connection)
+class _ThreadConnection:
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn):
+        self.conn = conn
+
+
+# SQLITE CONNECTION MANAGER
+# Keeps one long-lived connection per thread (closed when the thread exits) plus
+# a small pool of shared connections, so hot write paths no longer pay for
+# sqlite3.connect() on every statement.
+# An optional initializer (e.g. schema migrations) runs exactly once, on the
+# first connection opened.
+# Connections open in WAL mode so readers never block the writer, with
+# synchronous=NORMAL (durable at checkpoints, no fsync per commit) and a busy
+# timeout. Write transactions start with BEGIN IMMEDIATE so two writers queue
+# on the lock instead of deadlocking on a read-to-write upgrade.
+# auto_vacuum is set before the journal mode because SQLite only accepts it on a
+# file that has no tables yet and is not yet in WAL mode: new databases get
+# incremental vacuum from the start, existing ones are unaffected.
+class ConnectionManager:
+    def __init__(self, db_name, pool_size=4, initializer=None, journal_mode="WAL",
+                 synchronous="NORMAL", busy_timeout_ms=5000, auto_vacuum="INCREMENTAL"):
+        self.db_name = db_name
+        self.pool_size = pool_size
+        self.initializer = initializer
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.busy_timeout_ms = busy_timeout_ms
+        self.auto_vacuum = auto_vacuum
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        self._local = threading.local()
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._all_connections = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _open(self):
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection manager has been shut down")
+        conn = sqlite3.connect(self.db_name, timeout=self.busy_timeout_ms / 1000,
+                               check_same_thread=False, isolation_level="IMMEDIATE")
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        if self.auto_vacuum:
+            conn.execute(f"PRAGMA auto_vacuum = {self.auto_vacuum}")
+        conn.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        self._initialize(conn)
+        with self._lock:
+            self._all_connections.append(conn)
+        return conn
+
+    def _initialize(self, conn):
+        if self._initialized or self.initializer is None:
+            return
+        with self._init_lock:
+            if not self._initialized:
+                self.initializer(conn)
+                self._initialized = True
+
+    # PER-THREAD CONNECTION (REUSED FOR THE LIFETIME OF THE THREAD, CLOSED WHEN IT ENDS)
+    def thread_connection(self):
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            holder = _ThreadConnection(self._open())
+            weakref.finalize(holder, self._discard, holder.conn)
+            self._local.holder = holder
+        return holder.conn
+
+    def _discard(self, conn):
+        with self._lock:
+            if conn in self._all_connections:
+                self._all_connections.remove(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    # CHECK OUT A POOLED CONNECTION
+    def acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._open()
+
+    # RETURN A POOLED CONNECTION
+    def release(self, conn):
+        if self._closed:
+            conn.close()
+            return
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            self._discard(conn)
+
+    # TRANSACTION SCOPE ON THE CALLING THREAD'S CONNECTION
+    @contextmanager
+    def connection(self):
+        conn = self.thread_connection()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    # TRANSACTION SCOPE ON A CONNECTION CHECKED OUT FROM THE POOL
+    @contextmanager
+    def pooled(self):
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    # CLOSE EVERY CONNECTION OPENED BY THIS MANAGER
+    def close_all(self):
+        with self._lock:
+            self._closed = True
+            connections = self._all_connections
+            self._all_connections = []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        while not self._pool.empty():
+            self._pool.get_nowait()
+        self._local = threading.local()
@@ -1,10 +1,17 @@
-import sqlite3
-from datetime import datetime,timedelta
+import atexit
+import threading
+import time
+import math
+from datetime import datetime
 import pandas as pd
 import os
-import numpy as np
-from recommendation.recommendation_list import recommendations
-import random
+from services.connection_manager import ConnectionManager, retry_on_busy
+from services.schema import migrate
+from services.batch_writer import BatchWriter
+from services import rollups
+from services.retention import RetentionWorker
+from services.monitoring_flag import MonitoringFlag
+from services.recommendation_catalog import RecommendationCatalog
 
 # DATABASE CONNECTION
 DB_NAME = "databases/wellmind.db"
@@ -18,7 +25,7 @@ try:
         print(f"Folder '{database_path}' created.")
     # else:
     #     print(f"Folder '{database_path}' already exists.")
-    
+
     # Try connecting to the database
     # conn = sqlite3.connect(DB_NAME)
     # print("Database connected successfully.")
@@ -28,46 +35,80 @@ except Exception as e:
     print("An error occurred:", e)
 
 
+# Pending schema migrations run once, when the first connection is opened
+connection_manager = ConnectionManager(DB_NAME, initializer=migrate)
 
-def create_connection():
-    return sqlite3.connect(DB_NAME)
 
-# CREATE USER TABLE SQL QUERY
-def create_user_table():
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS user (
-            user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            first_name TEXT,
-            last_name TEXT,
-            gender TEXT,
-            birthday TEXT,
-            created_at TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
+# MANAGED CONNECTION: COMMITS ON SUCCESS, ROLLS BACK ON ERROR, NEVER CLOSED BY CALLER
+def get_connection():
+    return connection_manager.connection()
+
+# BRING THE SCHEMA UP TO DATE AT STARTUP
+def init_database():
+    connection_manager.thread_connection()
+
+# HIGH-FREQUENCY SAMPLES ARE GROUP-COMMITTED IN THE BACKGROUND
+batch_writer = BatchWriter(get_connection)
+
+# NO FACIAL SAMPLE OR KEYSTROKE SUMMARY FOR THIS LONG COUNTS AS IDLE
+IDLE_MINUTES = 10
+
+# NEWEST FACIAL SAMPLE OR KEYSTROKE SUMMARY (EPOCH MS), OR None ON AN EMPTY DATABASE
+def last_activity_ms():
+    with get_connection() as conn:
+        return conn.execute('''
+            SELECT MAX(latest) FROM (
+                SELECT MAX(timestamp) AS latest FROM facial_expression_data
+                UNION ALL
+                SELECT MAX(timestamp) FROM keystroke_summary
+            )
+        ''').fetchone()[0]
+
+def is_idle(idle_minutes=IDLE_MINUTES):
+    latest = last_activity_ms()
+    return latest is None or now_ms() - latest >= idle_minutes * 60000
+
+# EXPIRED ROWS ARE PRUNED AND THE FILE COMPACTED IN THE BACKGROUND, WHILE IDLE
+retention_worker = RetentionWorker(get_connection, is_idle=is_idle)
+
+def start_maintenance():
+    retention_worker.start()
+
+# FLUSH PENDING SAMPLES AND CLOSE ALL MANAGED CONNECTIONS ON SHUTDOWN
+def close_database():
+    retention_worker.stop()
+    batch_writer.stop()
+    connection_manager.close_all()
+
+atexit.register(close_database)
+
+# SAMPLE TABLES STORE TIMESTAMPS AS INTEGER EPOCH MILLISECONDS
+def now_ms():
+    return int(time.time() * 1000)
+
+def to_epoch_ms(dt):
+    return int(dt.timestamp() * 1000)
+
+def from_epoch_ms(ms):
+    return datetime.fromtimestamp(ms / 1000)
 
 # CREATE NEW USER ACCOUNT
+@retry_on_busy()
 def insert_user(first_name, last_name, gender, birthday):
-    conn = create_connection()
-    cursor = conn.cursor()
     created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    cursor.execute("""
-        INSERT INTO user (first_name, last_name, gender, birthday, created_at)
-        VALUES (?, ?, ?, ?, ?)
-    """, (first_name, last_name, gender, birthday, created_at))
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO user (first_name, last_name, gender, birthday, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (first_name, last_name, gender, birthday, created_at))
 
 # FETCH LATEST USER
 def fetch_latest_user():
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT user_id, first_name, last_name, birthday, gender FROM user ORDER BY user_id DESC LIMIT 1")
-    result = cursor.fetchone()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT user_id, first_name, last_name, birthday, gender FROM user ORDER BY user_id DESC LIMIT 1")
+        result = cursor.fetchone()
     if result:
         return {
             "user_id": result[0],
@@ -80,164 +121,113 @@ def fetch_latest_user():
 
 
 # DELETE USER ACCOUNT
+@retry_on_busy()
 def delete_user(user_id):
-    conn = create_connection()
-    cursor = conn.cursor()
-
-    # Optional: delete user preferences first for referential integrity
-    cursor.execute("DELETE FROM user_preferences_mapping WHERE user_id = ?", (user_id,))
-
-    # Then delete user
-    cursor.execute("DELETE FROM user WHERE user_id = ?", (user_id,))
-
-    conn.commit()
-    conn.close()
-
-# CREATE PREFERENCES CATEGORY AND PREFERENCES TABLE
-# def create_preferences_tables():
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS preferences_category (
-            category_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            category_name TEXT UNIQUE,
-            created_at TEXT
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS preferences (
-            preference_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            preference_name TEXT,
-            category_id INTEGER,
-            created_at TEXT,
-            FOREIGN KEY (category_id) REFERENCES preferences_category (category_id)
-        )
-    """)
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        # Optional: delete user preferences first for referential integrity
+        cursor.execute("DELETE FROM user_preferences_mapping WHERE user_id = ?", (user_id,))
+
+        # Then delete user
+        cursor.execute("DELETE FROM user WHERE user_id = ?", (user_id,))
 
 # IMPORT DATA TO THE PREFERENCES TABLE
-# def import_preferences_from_excel(excel_path="assets/documents/preferences.xlsx"):
+def import_preferences_from_excel(excel_path="assets/documents/preferences.xlsx"):
     if not os.path.exists(excel_path):
         print(f"File not found: {excel_path}")
         return
 
     df = pd.read_excel(excel_path)
 
-    conn = create_connection()
-    cursor = conn.cursor()
-
-    # --- Delete existing data ---
-    cursor.execute("DELETE FROM preferences")
-    cursor.execute("DELETE FROM preferences_category")
-    conn.commit()
-
-    # --- Prepare for inserting new data ---
-    created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    category_map = {}
-
-    for _, row in df.iterrows():
-        preference_name = row['Preference Name']
-        category_name = row['Category']
-
-        # Insert category if not already inserted
-        if category_name not in category_map:
-            cursor.execute("SELECT category_id FROM preferences_category WHERE category_name = ?", (category_name,))
-            category = cursor.fetchone()
-            if category:
-                category_id = category[0]
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        # --- Delete existing data ---
+        cursor.execute("DELETE FROM preferences")
+        cursor.execute("DELETE FROM preferences_category")
+
+        # --- Prepare for inserting new data ---
+        created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        category_map = {}
+
+        for _, row in df.iterrows():
+            preference_name = row['Preference Name']
+            category_name = row['Category']
+
+            # Insert category if not already inserted
+            if category_name not in category_map:
+                cursor.execute("SELECT category_id FROM preferences_category WHERE category_name = ?", (category_name,))
+                category = cursor.fetchone()
+                if category:
+                    category_id = category[0]
+                else:
+                    cursor.execute(
+                        "INSERT INTO preferences_category (category_name, created_at) VALUES (?, ?)",
+                        (category_name, created_at)
+                    )
+                    category_id = cursor.lastrowid
+                category_map[category_name] = category_id
             else:
-                cursor.execute(
-                    "INSERT INTO preferences_category (category_name, created_at) VALUES (?, ?)",
-                    (category_name, created_at)
-                )
-                category_id = cursor.lastrowid
-            category_map[category_name] = category_id
-        else:
-            category_id = category_map[category_name]
-
-        # Insert preference
-        cursor.execute("""
-            INSERT INTO preferences (preference_name, category_id, created_at)
-            VALUES (?, ?, ?)
-        """, (preference_name, category_id, created_at))
-
-    conn.commit()
-    conn.close()
-
-# CREATE USER PREFERENCES MAPPING TABLE
-# def create_user_preferences_mapping_table():
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS user_preferences_mapping (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            preference_id INTEGER,
-            created_at TEXT,
-            FOREIGN KEY (user_id) REFERENCES user(user_id),
-            FOREIGN KEY (preference_id) REFERENCES preferences(preference_id)
-        )
-    """)
-    conn.commit()
-    conn.close()
+                category_id = category_map[category_name]
+
+            # Insert preference
+            cursor.execute("""
+                INSERT INTO preferences (preference_name, category_id, created_at)
+                VALUES (?, ?, ?)
+            """, (preference_name, category_id, created_at))
 
 # FETCH PREFERENCE CATEGORIES SQL QUERY
-# def get_all_categories():
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT category_id, category_name FROM preferences_category ORDER BY category_name")
-    categories = cursor.fetchall()
-    conn.close()
+def get_all_categories():
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT category_id, category_name FROM preferences_category ORDER BY category_name")
+        categories = cursor.fetchall()
     return categories
 
 # FETCH CATEGORY WISE PREFERENCES SQL QUERY
-# def get_preferences_by_category(category_id):
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT preference_id, preference_name FROM preferences 
-        WHERE category_id = ? ORDER BY preference_name
-    """, (category_id,))
-    preferences = cursor.fetchall()
-    conn.close()
+def get_preferences_by_category(category_id):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT preference_id, preference_name FROM preferences
+            WHERE category_id = ? ORDER BY preference_name
+        """, (category_id,))
+        preferences = cursor.fetchall()
     return preferences
 
 # FETCH PREFERENCES WITH ID
-# def get_preference_id_by_name(name):
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT preference_id FROM preferences WHERE preference_name = ?", (name,))
-    result = cursor.fetchone()
-    conn.close()
+def get_preference_id_by_name(name):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT preference_id FROM preferences WHERE preference_name = ?", (name,))
+        result = cursor.fetchone()
     return result[0] if result else None
 
 # SAVE USER SELECTED PREFERENCES ON THE DATABASE
-# def insert_user_preference_mapping(user_id, preference_id):
-    conn = create_connection()
-    cursor = conn.cursor()
+@retry_on_busy()
+def insert_user_preference_mapping(user_id, preference_id):
     created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    cursor.execute("""
-        INSERT INTO user_preferences_mapping (user_id, preference_id, created_at)
-        VALUES (?, ?, ?)
-    """, (user_id, preference_id, created_at))
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO user_preferences_mapping (user_id, preference_id, created_at)
+            VALUES (?, ?, ?)
+        """, (user_id, preference_id, created_at))
 
 # FETCH USER PREFERENCES LIST
-# def get_user_preferences_by_user_id(user_id):
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT pc.category_name, p.preference_name
-        FROM user_preferences_mapping upm
-        JOIN preferences p ON upm.preference_id = p.preference_id
-        JOIN preferences_category pc ON p.category_id = pc.category_id
-        WHERE upm.user_id = ?
-        ORDER BY pc.category_name, p.preference_name
-    """, (user_id,))
-    rows = cursor.fetchall()
-    conn.close()
+def get_user_preferences_by_user_id(user_id):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT pc.category_name, p.preference_name
+            FROM user_preferences_mapping upm
+            JOIN preferences p ON upm.preference_id = p.preference_id
+            JOIN preferences_category pc ON p.category_id = pc.category_id
+            WHERE upm.user_id = ?
+            ORDER BY pc.category_name, p.preference_name
+        """, (user_id,))
+        rows = cursor.fetchall()
 
     result = {}
     for category_name, preference_name in rows:
@@ -246,121 +236,91 @@ def delete_user(user_id):
         result[category_name].append(preference_name)
     return result
 
-# STORAGE FOR FACIAL EXPRESSION DATA
+# STORAGE FOR FACIAL EXPRESSION DATA (QUEUED, RETURNS IMMEDIATELY)
 def store_facial_expression_data(stress_percentage):
-    conn = create_connection()
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS facial_expression_data (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT NOT NULL,
-            stress_value REAL NOT NULL
-        )
-    ''')
-
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    timestamp = now_ms()
+    # One enqueue, so the raw row and its rollups commit in the same transaction
+    batch_writer.enqueue_many([
+        ('''
+            INSERT INTO facial_expression_data (timestamp, stress_value)
+            VALUES (?, ?)
+        ''', (timestamp, stress_percentage)),
+    ] + rollups.rollup_statements(rollups.FACIAL, timestamp, stress_percentage))
+
+# CAMERA ON AND OFF (PERSISTED STATE)
+def load_facial_monitoring():
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT value FROM facial_expression_monitoring LIMIT 1")
+        result = cursor.fetchone()
+    return bool(result[0]) if result else True
+
+@retry_on_busy()
+def persist_facial_monitoring(value):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE facial_expression_monitoring SET value = ?", (value,))
 
-    cursor.execute('''
-        INSERT INTO facial_expression_data (timestamp, stress_value)
-        VALUES (?, ?)
-    ''', (timestamp, stress_percentage))
-    conn.commit()
-    conn.close()
+# The flag lives in memory; SQLite is only touched on first read and on change
+facial_monitoring_flag = MonitoringFlag(load_facial_monitoring, persist_facial_monitoring)
 
 # CAMERA ON AND OFF
 def monitoring_facial_expression(value=None):
-    conn = create_connection()
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS facial_expression_monitoring (
-            value BOOLEAN
-        )
-    ''')
-
-    cursor.execute("SELECT COUNT(*) FROM facial_expression_monitoring")
-    row_count = cursor.fetchone()[0]
-    if row_count == 0:
-        cursor.execute("INSERT INTO facial_expression_monitoring (value) VALUES (?)", (True,))
-        conn.commit()
-
     if value is not None:
-        cursor.execute("UPDATE facial_expression_monitoring SET value = ?", (value,))
-        conn.commit()
-        conn.close()
+        facial_monitoring_flag.set(value)
         return bool(value)
-    else:
-        cursor.execute("SELECT COUNT(*) FROM facial_expression_monitoring")
-        row_count = cursor.fetchone()[0]
-
-        
-
-        if row_count == 0:
-            cursor.execute("INSERT INTO facial_expression_monitoring (value) VALUES (?)", (True,))
-            conn.commit()
-            conn.close()
-            return True
-        else:
-            cursor.execute("SELECT value FROM facial_expression_monitoring LIMIT 1")
-            result = cursor.fetchone()
-            conn.close()
-            return bool(result[0])
-
-# GET LATEST FACIAL EXPRESSION DATA
-def get_latest_facial_expression_data(duration=20, timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S")):
-
-    start_time = datetime.strptime(timestamp,"%Y-%m-%d %H:%M:%S")
-    before_time = start_time - timedelta(minutes=duration)
-    start_time = datetime.strftime(start_time,"%Y-%m-%d %H:%M:%S")
-    before_time = datetime.strftime(before_time,"%Y-%m-%d %H:%M:%S")
-
-
-    conn = create_connection()
-    cursor = conn.cursor()
-
-
-    # cursor.execute("SELECT datetime('now')")
-    # print("SQLite now (UTC):", cursor.fetchone()[0])
-
-    # start_time = '2025-07-15 17:04:00'
-    # end_time = '2025-07-15 17:05:00'
-
-    cursor.execute("""
-        SELECT * FROM facial_expression_data
-        WHERE timestamp BETWEEN ? AND ?
-    """, (before_time, start_time))
-
-    rows = cursor.fetchall()
-
-    stress_values = [row[2] for row in rows]
-    stress_array = np.array(stress_values, dtype=np.float32)
-
-    if len(stress_array) > 0:
-        mean_value = np.mean(stress_array)
-        # print(len(stress_values))
-        mean_value = round(float(mean_value), 2)
-
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS facial_expression_summary (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT NOT NULL,
-            stress_value REAL NOT NULL
-        )''')
-
-        conn.commit()
-
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return facial_monitoring_flag.get()
+
+# BLOCK (WITHOUT POLLING) UNTIL FACIAL MONITORING IS SWITCHED ON
+def wait_for_facial_monitoring(timeout=None):
+    return facial_monitoring_flag.wait_until_enabled(timeout)
+
+# WINDOW AGGREGATES COMPUTED INSIDE SQLITE (READ ONLY)
+# Only whitelisted (table, column) pairs are accepted since they are formatted into the SQL
+STAT_COLUMNS = {
+    "facial_expression_data": ("stress_value",),
+    "facial_expression_summary": ("stress_value",),
+    "keystroke_summary": ("stress_percentage", "stress_label"),
+    "overall_stress": ("facial_expression_stress", "keystroke_stress", "stress_level"),
+}
+
+def get_window_stats(table, column, start_ms, end_ms):
+    if column not in STAT_COLUMNS.get(table, ()):
+        raise ValueError(f"No window statistics for {table}.{column}")
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT COUNT({column}), AVG({column}), MIN({column}), MAX({column}), SUM({column} * {column})
+            FROM {table}
+            WHERE timestamp BETWEEN ? AND ?
+        """, (start_ms, end_ms))
+        count, mean, minimum, maximum, sum_squares = cursor.fetchone()
+
+    if count == 0:
+        return {"count": 0, "mean": None, "min": None, "max": None, "stddev": None}
+    variance = max(0.0, sum_squares / count - mean * mean)
+    return {"count": count, "mean": mean, "min": minimum, "max": maximum, "stddev": math.sqrt(variance)}
+
+# GET LATEST FACIAL EXPRESSION DATA (MEAN OVER THE LAST `duration` MINUTES)
+def get_latest_facial_expression_data(duration=20, timestamp=None):
+    end_time = timestamp if timestamp is not None else now_ms()
+    stats = get_window_stats("facial_expression_data", "stress_value", end_time - duration * 60 * 1000, end_time)
+    if stats["count"] == 0:
+        return None
+    return round(stats["mean"], 2)
+
+# PERSIST A FACIAL EXPRESSION SUMMARY VALUE
+@retry_on_busy()
+def store_facial_expression_summary(stress_value, timestamp=None):
+    if timestamp is None:
+        timestamp = now_ms()
+    with get_connection() as conn:
+        cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO facial_expression_summary (timestamp, stress_value)
             VALUES (?, ?)
-        ''', (timestamp, mean_value))
-        conn.commit()
-        conn.close()
-        return mean_value
-    else:
-        conn.close()
-        return None
+        ''', (timestamp, stress_value))
 
 # GET LATEST KEYSTROKE DATA
 # def get_latest_keystroke_data(duration=20, timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S")):
@@ -395,189 +355,169 @@ def get_latest_facial_expression_data(duration=20, timestamp=datetime.now().strf
 #         conn.close()
 #         return "No data available"
 
-# CREATE RECOMMENDATION LOG TABLE
-def create_recommendations_log_table():
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS recommendations_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            recommendation_id TEXT NOT NULL,
-            created_at TEXT NOT NULL,
-            feedback INTEGER,
-            updated_at TEXT       
-        )
-    """)
-    conn.commit()
-    conn.close()
-
 # SAVE RECOMMENDATION
+@retry_on_busy()
 def insert_recommendation_log(recommendation_id):
-    conn = create_connection()
-    cursor = conn.cursor()
     created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     updated_at = created_at  # Initially, updated_at is the same as created_at
-    cursor.execute("""
-        INSERT INTO recommendations_log (recommendation_id, created_at, feedback, updated_at)
-        VALUES (?, ?, ?, ?)
-    """, (recommendation_id, created_at, None, updated_at))
-    conn.commit()
-    conn.close()
-
-# UPDATE RECOMMENDATION WITH USER FEEDBACK
-def update_recommendation_feedback(recommendation_id, feedback):
-    updated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE recommendations_log
-        SET feedback = ?, updated_at = ?
-        WHERE recommendation_id = ?
-    """, (feedback, updated_at, recommendation_id))
-    conn.commit()
-    conn.close()
-
-
-def init_recommendations():
-    conn = create_connection()
-    cursor = conn.cursor()
-    table_name = 'recommendation'
-
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
-    result = cursor.fetchone()
-
-    if result is None:
-        # print(f"Table '{table_name}' does NOT exist.")
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS recommendation (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                level INTEGER NOT NULL,
-                content TEXT NOT NULL,
-                score INTEGER NOT NULL      
-            )
-        """)
-        conn.commit()
-
-        cursor.executemany("INSERT INTO recommendation (level, content, score) VALUES (?, ?, ?)", [(level, item, 0) for level in recommendations for item in recommendations[level]])
-        conn.commit()
-    # else:
-    #     print(f"Table '{table_name}' exists.")
-    conn.commit()
-    conn.close()
-
-
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO recommendations_log (recommendation_id, created_at, feedback, updated_at)
+            VALUES (?, ?, ?, ?)
+        """, (recommendation_id, created_at, None, updated_at))
+
+# RECOMMENDATION CATALOG, LOADED ONCE AND SERVED FROM MEMORY
+# SQLite stays the source of truth: score changes are written as additive deltas
+# on the batch writer and applied to the catalog only once they have committed,
+# so a dropped batch leaves both unchanged.
+_recommendation_catalog = None
+_recommendation_catalog_lock = threading.Lock()
+
+def get_recommendation_catalog():
+    global _recommendation_catalog
+    if _recommendation_catalog is None:
+        with _recommendation_catalog_lock:
+            if _recommendation_catalog is None:
+                with get_connection() as conn:
+                    rows = conn.execute("SELECT id, level, content, score FROM recommendation").fetchall()
+                _recommendation_catalog = RecommendationCatalog(rows)
+    return _recommendation_catalog
 
 def get_recommendations(level=1):
-    init_recommendations()
-
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, content, score FROM recommendation WHERE level = ? AND score = 0", (level,))
-    row = cursor.fetchall()
-    if len(row) != 0:
-        random_row = random.choice(row)
-        conn.close()
-        # print("database:", random_row)
-        return random_row
-
-    else :
-        cursor.execute(
-        "SELECT id, content, score FROM recommendation WHERE level = ? ORDER BY score DESC LIMIT 10",(level,))
-        row = cursor.fetchall()
-        random_row = random.choice(row)
-        conn.close()
-        # print("database:", random_row)
-        return random_row
-
+    return get_recommendation_catalog().pick(level)
 
-    recommendations = cursor.fetchall()
-    conn.close()
-    return recommendations
+def recommendation_score_statement(id, is_liked):
+    return ("UPDATE recommendation SET score = score + ? WHERE id = ?", (1 if is_liked else -1, id))
 
+# POST-COMMIT CATALOG UPDATE FOR A SCORE DELTA
+# The catalog is loaded here, before the write is queued, so a later first load
+# can never read the committed delta and then apply it a second time.
+def recommendation_score_applier(id, is_liked):
+    catalog = get_recommendation_catalog()
+    return lambda: catalog.adjust_score(id, 1 if is_liked else -1)
 
 def set_recommendation_score(id, is_liked):
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT score FROM recommendation WHERE id = ?", (id,))
-    current_score = cursor.fetchone()[0]
-
-    if is_liked:
-        current_score += 1
-    else:
-        current_score -= 1
-
-    cursor.execute("UPDATE recommendation SET score = ? WHERE id = ?", (current_score, id))
-    conn.commit()
-    conn.close()
+    batch_writer.enqueue(*recommendation_score_statement(id, is_liked),
+                         on_commit=recommendation_score_applier(id, is_liked))
 
-def get_latest_keystroke_data(duration=25, timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S")):
-    conn = create_connection()
-    cursor = conn.cursor()
+# FEEDBACK LOG AND SCORE CHANGE, COMMITTED TOGETHER BY THE BATCH WRITER
+def record_recommendation_feedback(recommendation_id, feedback):
+    updated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    batch_writer.enqueue_many([
+        ("""
+            UPDATE recommendations_log
+            SET feedback = ?, updated_at = ?
+            WHERE recommendation_id = ?
+        """, (feedback, updated_at, recommendation_id)),
+        recommendation_score_statement(recommendation_id, bool(feedback)),
+    ], on_commit=recommendation_score_applier(recommendation_id, bool(feedback)))
+
+# STORE A KEYSTROKE SUMMARY WINDOW
+@retry_on_busy()
+def store_keystroke_summary(stress_label, stress_percentage, timestamp=None):
+    if timestamp is None:
+        timestamp = now_ms()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            'INSERT INTO keystroke_summary (timestamp, stress_label, stress_percentage) VALUES (?, ?, ?)',
+            (timestamp, stress_label, stress_percentage)
+        )
 
-    start_time = datetime.strptime(timestamp,"%Y-%m-%d %H:%M:%S")
-    before_time = start_time - timedelta(minutes=duration)
-    start_time = datetime.strftime(start_time,"%Y-%m-%d %H:%M:%S")
-    before_time = datetime.strftime(before_time,"%Y-%m-%d %H:%M:%S")
+def get_latest_keystroke_data(duration=25, timestamp=None):
+    start_time = timestamp if timestamp is not None else now_ms()
+    before_time = start_time - duration * 60 * 1000
 
-    cursor.execute("""
-        SELECT * FROM keystroke_summary
-        WHERE timestamp BETWEEN ? AND ?
-        ORDER BY timestamp DESC
-        LIMIT 1
-    """, (before_time, start_time))
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT * FROM keystroke_summary
+            WHERE timestamp BETWEEN ? AND ?
+            ORDER BY timestamp DESC
+            LIMIT 1
+        """, (before_time, start_time))
 
+        row = cursor.fetchone()
 
-    row = cursor.fetchone()
     if row :
         print(row)
         return row[3] # Latest keystroke stress presentage in keystroke summary
     else:
         print("databse: No keystroke data found")
         return None
-    conn.close()
 
 
 
-def store_realtime_stress(facial_expression_stress,keystroke_stress, stress_level, timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S")):
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS overall_stress (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT NOT NULL,
-            facial_expression_stress REAL,
-            keystroke_stress REAL,
-            stress_level INTEGER NOT NULL
-        )
-    """)
-    conn.commit()
-
-    cursor.execute("""
-        INSERT INTO overall_stress (timestamp, facial_expression_stress, keystroke_stress, stress_level)
-        VALUES (?, ?, ?, ?)
-    """, (timestamp, facial_expression_stress, keystroke_stress, stress_level))
-    conn.commit()
-    conn.close()
-
-
-
-def log_error(error_message, timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S")):
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS error_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT NOT NULL,
-            error_message TEXT NOT NULL
-        )
-    """)
-    conn.commit()
-
-    cursor.execute("""
-        INSERT INTO error_log (timestamp, error_message)
-        VALUES (?, ?)
-    """, (timestamp, error_message))
-    conn.commit()
-    conn.close()
\ No newline at end of file
+@retry_on_busy()
+def store_realtime_stress(facial_expression_stress,keystroke_stress, stress_level, timestamp=None):
+    if timestamp is None:
+        timestamp = now_ms()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO overall_stress (timestamp, facial_expression_stress, keystroke_stress, stress_level)
+            VALUES (?, ?, ?, ?)
+        """, (timestamp, facial_expression_stress, keystroke_stress, stress_level))
+
+        value = rollups.overall_value(facial_expression_stress, keystroke_stress)
+        if value is not None:
+            for sql, params in rollups.rollup_statements(rollups.OVERALL, timestamp, value):
+                cursor.execute(sql, params)
+
+
+
+@retry_on_busy()
+def log_error(error_message, timestamp=None):
+    if timestamp is None:
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO error_log (timestamp, error_message)
+            VALUES (?, ?)
+        """, (timestamp, error_message))
+
+
+# STRESS HISTORY FROM THE ROLLUP TABLES
+# Buckets that overlap [start_ms, end_ms] are returned whole.
+def get_stress_series(source, start_ms, end_ms, points):
+    table = rollups.pick_resolution(start_ms, end_ms, points)
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT bucket_start, value_sum / sample_count, value_max, sample_count, peak_timestamp
+            FROM {table}
+            WHERE source = ? AND bucket_start BETWEEN ? AND ?
+            ORDER BY bucket_start
+        """, (source, rollups.BUCKET_FUNCTIONS[table](start_ms), end_ms))
+        rows = cursor.fetchall()
+    return [
+        {"bucket_start": row[0], "mean": row[1], "max": row[2], "count": row[3], "peak_timestamp": row[4]}
+        for row in rows
+    ]
+
+# MEAN, PEAK AND TIME OF PEAK OVER A RANGE
+def get_stress_overview(source, start_ms, end_ms):
+    series = get_stress_series(source, start_ms, end_ms, points=1)
+    count = sum(bucket["count"] for bucket in series)
+    if count == 0:
+        return None
+    peak = max(series, key=lambda bucket: bucket["max"])
+    return {
+        "mean": sum(bucket["mean"] * bucket["count"] for bucket in series) / count,
+        "max": peak["max"],
+        "peak_timestamp": peak["peak_timestamp"],
+        "count": count,
+    }
+
+# MEAN OF THE MOST RECENT MINUTE BUCKET
+def get_current_stress(source):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT value_sum / sample_count FROM stress_rollup_minute
+            WHERE source = ? ORDER BY bucket_start DESC LIMIT 1
+        """, (source,))
+        row = cursor.fetchone()
+    return row[0] if row else None
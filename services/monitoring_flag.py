@@ -0,0 +1,51 @@
+import threading
+
+
+# IN-MEMORY ON/OFF FLAG WITH CHANGE NOTIFICATION
+# The value is read from storage once, kept in memory and written back only when
+# it actually changes. Threads can block on wait_until_enabled() at zero CPU and
+# wake as soon as the flag is switched back on; listeners are called on change.
+class MonitoringFlag:
+    def __init__(self, load, persist):
+        self._load = load
+        self._persist = persist
+        self._value = None
+        self._condition = threading.Condition()
+        self._listeners = []
+
+    def _ensure_loaded(self):
+        if self._value is None:
+            self._value = bool(self._load())
+
+    def get(self):
+        with self._condition:
+            self._ensure_loaded()
+            return self._value
+
+    def set(self, value):
+        value = bool(value)
+        with self._condition:
+            self._ensure_loaded()
+            if value == self._value:
+                return False
+            self._persist(value)
+            self._value = value
+            self._condition.notify_all()
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(value)
+        return True
+
+    # BLOCK UNTIL THE FLAG IS ON; RETURNS FALSE IF THE TIMEOUT EXPIRED FIRST
+    def wait_until_enabled(self, timeout=None):
+        with self._condition:
+            self._ensure_loaded()
+            return self._condition.wait_for(lambda: self._value, timeout)
+
+    def add_listener(self, listener):
+        with self._condition:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self._condition:
+            self._listeners.remove(listener)
@@ -0,0 +1,81 @@
+import random
+import threading
+from bisect import bisect_left, insort
+
+
+TOP_RATED_POOL = 10
+
+
+# IN-MEMORY RECOMMENDATION CATALOG
+# Loaded once from the `recommendation` table and indexed by level. Each level
+# keeps an "unseen" pool (score == 0) as a list plus an id -> position map, so
+# picking and removing are O(1), and a score-ordered list whose first
+# TOP_RATED_POOL entries are the fallback once every item has been rated.
+# The catalog never writes to SQLite itself; callers persist score deltas.
+class RecommendationCatalog:
+    def __init__(self, rows):
+        self._lock = threading.Lock()
+        self._items = {}
+        self._unseen = {}
+        self._unseen_index = {}
+        self._ranked = {}
+        for rec_id, level, content, score in rows:
+            self._items[rec_id] = [level, content, score]
+            self._ranked.setdefault(level, [])
+            self._unseen.setdefault(level, [])
+            insort(self._ranked[level], (-score, rec_id))
+            if score == 0:
+                self._add_unseen(level, rec_id)
+
+    def _add_unseen(self, level, rec_id):
+        pool = self._unseen[level]
+        self._unseen_index[rec_id] = len(pool)
+        pool.append(rec_id)
+
+    def _remove_unseen(self, level, rec_id):
+        pool = self._unseen[level]
+        position = self._unseen_index.pop(rec_id)
+        last = pool.pop()
+        if last != rec_id:
+            pool[position] = last
+            self._unseen_index[last] = position
+
+    def __len__(self):
+        return len(self._items)
+
+    # PICK (id, content, score) FOR A LEVEL, OR None IF THE LEVEL HAS NO ITEMS
+    def pick(self, level):
+        with self._lock:
+            pool = self._unseen.get(level)
+            if pool:
+                rec_id = random.choice(pool)
+            else:
+                ranked = self._ranked.get(level)
+                if not ranked:
+                    return None
+                rec_id = random.choice(ranked[:TOP_RATED_POOL])[1]
+            _, content, score = self._items[rec_id]
+            return (rec_id, content, score)
+
+    # APPLY A SCORE CHANGE IN MEMORY; RETURNS THE NEW SCORE
+    def adjust_score(self, rec_id, delta):
+        with self._lock:
+            item = self._items[rec_id]
+            level, _, old_score = item
+            new_score = old_score + delta
+
+            ranked = self._ranked[level]
+            del ranked[bisect_left(ranked, (-old_score, rec_id))]
+            insort(ranked, (-new_score, rec_id))
+
+            if old_score == 0 and new_score != 0:
+                self._remove_unseen(level, rec_id)
+            elif old_score != 0 and new_score == 0:
+                self._add_unseen(level, rec_id)
+
+            item[2] = new_score
+            return new_score
+
+    def get_score(self, rec_id):
+        with self._lock:
+            return self._items[rec_id][2]
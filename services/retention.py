@@ -0,0 +1,149 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from services.connection_manager import retry_on_busy
+
+
+# RETENTION POLICY PER TABLE: (time column, column format, key columns, days to keep)
+# Days of None keep rows forever. Raw samples are only needed for short windows;
+# the rollup tables carry the long-term history.
+RETENTION_POLICIES = {
+    "facial_expression_data": ("timestamp", "epoch_ms", "rowid", 7),
+    "facial_expression_summary": ("timestamp", "epoch_ms", "rowid", 30),
+    "keystroke_summary": ("timestamp", "epoch_ms", "rowid", 30),
+    "overall_stress": ("timestamp", "epoch_ms", "rowid", 30),
+    "error_log": ("timestamp", "text", "rowid", 30),
+    "recommendations_log": ("created_at", "text", "rowid", 180),
+    "stress_rollup_minute": ("bucket_start", "epoch_ms", "source, bucket_start", 90),
+    "stress_rollup_hour": ("bucket_start", "epoch_ms", "source, bucket_start", None),
+    "stress_rollup_day": ("bucket_start", "epoch_ms", "source, bucket_start", None),
+}
+
+
+def retention_cutoff(column_format, days, now=None):
+    cutoff = (now or datetime.now()) - timedelta(days=days)
+    if column_format == "epoch_ms":
+        return int(cutoff.timestamp() * 1000)
+    return cutoff.strftime("%Y-%m-%d %H:%M:%S")
+
+
+# BACKGROUND RETENTION AND COMPACTION
+# Deletes expired rows in small chunks (one short transaction each, with a pause
+# in between so the capture writers are never held up) and then returns freed
+# pages to the file system with PRAGMA incremental_vacuum.
+# Work only happens while is_idle() is true (checked every check_interval
+# seconds): the one-time switch of an old database to incremental vacuum, which
+# needs a full VACUUM, and then a retention pass at most every interval seconds.
+class RetentionWorker:
+    def __init__(self, get_connection, policies=RETENTION_POLICIES, chunk_size=500,
+                 chunk_pause=0.05, vacuum_pages=200, interval=15 * 60, is_idle=None,
+                 check_interval=60):
+        self.get_connection = get_connection
+        self.policies = policies
+        self.chunk_size = chunk_size
+        self.chunk_pause = chunk_pause
+        self.vacuum_pages = vacuum_pages
+        self.interval = interval
+        self.is_idle = is_idle or (lambda: True)
+        self.check_interval = check_interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    @retry_on_busy()
+    def _delete_chunk(self, table, column, key, cutoff):
+        with self.get_connection() as conn:
+            cursor = conn.execute(f"""
+                DELETE FROM {table} WHERE ({key}) IN (
+                    SELECT {key} FROM {table} WHERE {column} < ? LIMIT ?
+                )
+            """, (cutoff, self.chunk_size))
+            return cursor.rowcount
+
+    # DELETE EXPIRED ROWS FROM EVERY TABLE, ONE CHUNK AT A TIME
+    def prune(self, now=None):
+        deleted = {}
+        for table, (column, column_format, key, days) in self.policies.items():
+            if days is None:
+                continue
+            cutoff = retention_cutoff(column_format, days, now)
+            total = 0
+            while not self._stop.is_set():
+                count = self._delete_chunk(table, column, key, cutoff)
+                total += count
+                if count < self.chunk_size:
+                    break
+                time.sleep(self.chunk_pause)
+            if total:
+                deleted[table] = total
+        return deleted
+
+    # SWITCH AN EXISTING DATABASE TO INCREMENTAL AUTO-VACUUM (ONE FULL VACUUM, ONCE)
+    def enable_incremental_vacuum(self):
+        with self.get_connection() as conn:
+            auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if auto_vacuum == 2:
+            return False
+        # VACUUM cannot run inside a transaction, so these run after the block has committed
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return True
+
+    # RELEASE UP TO `pages` FREE PAGES; RETURNS THE NUMBER RELEASED
+    def incremental_vacuum(self, pages=None):
+        with self.get_connection() as conn:
+            before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            # execute() steps the pragma once (one page); executescript() runs it to completion
+            conn.executescript(f"PRAGMA incremental_vacuum({int(pages or self.vacuum_pages)});")
+            after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return before - after
+
+    def run_pass(self, now=None):
+        deleted = self.prune(now)
+        freed_pages = 0
+        while not self._stop.is_set():
+            freed = self.incremental_vacuum()
+            freed_pages += freed
+            if freed < self.vacuum_pages:
+                break
+            time.sleep(self.chunk_pause)
+        with self.get_connection() as conn:
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+        return deleted, freed_pages
+
+    def _run(self):
+        vacuum_checked = False
+        last_pass = None
+        while not self._stop.wait(self.check_interval):
+            if not self.is_idle():
+                continue
+            if not vacuum_checked:
+                vacuum_checked = True
+                try:
+                    if self.enable_incremental_vacuum():
+                        print("Retention: switched the database to incremental vacuum")
+                except Exception as e:
+                    print(f"[ERROR] RetentionWorker could not enable incremental vacuum: {e}")
+                continue
+            if last_pass is not None and time.monotonic() - last_pass < self.interval:
+                continue
+            last_pass = time.monotonic()
+            try:
+                deleted, freed_pages = self.run_pass()
+                if deleted or freed_pages:
+                    print(f"Retention: deleted {deleted}, released {freed_pages} pages")
+            except Exception as e:
+                print(f"[ERROR] RetentionWorker: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="RetentionWorker", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
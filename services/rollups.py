@@ -0,0 +1,111 @@
+from datetime import datetime
+
+
+# MULTI-RESOLUTION STRESS ROLLUPS
+# Every stored sample is folded into one minute, one hour and one (local) day
+# bucket per source. Each bucket keeps the sample count, the running sum (for
+# the mean), the maximum and the time of that maximum, so week- and month-scale
+# charts read a handful of rows instead of every raw sample.
+
+MINUTE_MS = 60 * 1000
+HOUR_MS = 60 * MINUTE_MS
+DAY_MS = 24 * HOUR_MS
+
+# Coarsest first: (table, nominal bucket length in ms)
+RESOLUTIONS = [
+    ("stress_rollup_day", DAY_MS),
+    ("stress_rollup_hour", HOUR_MS),
+    ("stress_rollup_minute", MINUTE_MS),
+]
+
+# Rollup sources
+FACIAL = "facial"
+OVERALL = "overall"
+
+
+# Overall stress rolls up the higher of the two modalities, matching how the
+# recommender picks the final level
+def overall_value(facial_expression_stress, keystroke_stress):
+    values = [v for v in (facial_expression_stress, keystroke_stress) if v is not None]
+    return max(values) if values else None
+
+# Raw sample queries per source, used when backfilling
+SOURCE_SQL = {
+    FACIAL: "SELECT timestamp, stress_value AS value FROM facial_expression_data",
+    OVERALL: """
+        SELECT timestamp,
+            CASE WHEN facial_expression_stress IS NULL THEN keystroke_stress
+                 WHEN keystroke_stress IS NULL THEN facial_expression_stress
+                 ELSE MAX(facial_expression_stress, keystroke_stress)
+            END AS value
+        FROM overall_stress
+    """,
+}
+
+
+# BUCKET START TIMES (EPOCH MS). HOURS AND DAYS FOLLOW LOCAL TIME, LIKE THE DASHBOARD.
+def minute_bucket(timestamp_ms):
+    return timestamp_ms - timestamp_ms % MINUTE_MS
+
+def hour_bucket(timestamp_ms):
+    local = datetime.fromtimestamp(timestamp_ms / 1000).replace(minute=0, second=0, microsecond=0)
+    return int(local.timestamp() * 1000)
+
+def day_bucket(timestamp_ms):
+    local = datetime.fromtimestamp(timestamp_ms / 1000).replace(hour=0, minute=0, second=0, microsecond=0)
+    return int(local.timestamp() * 1000)
+
+BUCKET_FUNCTIONS = {
+    "stress_rollup_minute": minute_bucket,
+    "stress_rollup_hour": hour_bucket,
+    "stress_rollup_day": day_bucket,
+}
+
+# SQLite equivalents of the bucket functions, used when backfilling from raw rows
+BUCKET_SQL = {
+    "stress_rollup_minute": "({ts} - {ts} % 60000)",
+    "stress_rollup_hour": "CAST(strftime('%s', strftime('%Y-%m-%d %H:00:00', {ts} / 1000, 'unixepoch', 'localtime'), 'utc') AS INTEGER) * 1000",
+    "stress_rollup_day": "CAST(strftime('%s', date({ts} / 1000, 'unixepoch', 'localtime'), 'utc') AS INTEGER) * 1000",
+}
+
+
+def upsert_sql(table):
+    # Right-hand sides see the old row, so peak_timestamp compares against the old maximum
+    return f"""
+        INSERT INTO {table} (source, bucket_start, sample_count, value_sum, value_max, peak_timestamp)
+        VALUES (?, ?, 1, ?, ?, ?)
+        ON CONFLICT (source, bucket_start) DO UPDATE SET
+            sample_count = sample_count + 1,
+            value_sum = value_sum + excluded.value_sum,
+            peak_timestamp = CASE WHEN excluded.value_max > value_max THEN excluded.peak_timestamp ELSE peak_timestamp END,
+            value_max = MAX(value_max, excluded.value_max)
+    """
+
+UPSERT_SQL = {table: upsert_sql(table) for table, _ in RESOLUTIONS}
+
+
+# (sql, params) STATEMENTS THAT FOLD ONE SAMPLE INTO EVERY RESOLUTION
+def rollup_statements(source, timestamp_ms, value):
+    return [
+        (UPSERT_SQL[table], (source, BUCKET_FUNCTIONS[table](timestamp_ms), value, value, timestamp_ms))
+        for table, _ in RESOLUTIONS
+    ]
+
+
+# BUCKETS OF ONE RESOLUTION SPANNED BY A RANGE
+# Days are counted on the local calendar: a week across a DST change is 7 day
+# buckets even though it is an hour shorter or longer than 7 * DAY_MS.
+def bucket_count(table, bucket_ms, start_ms, end_ms):
+    if table == "stress_rollup_day":
+        start_day = datetime.fromtimestamp(start_ms / 1000).date()
+        end_day = datetime.fromtimestamp(end_ms / 1000).date()
+        return max(0, (end_day - start_day).days)
+    return max(0, end_ms - start_ms) / bucket_ms
+
+
+# COARSEST RESOLUTION THAT STILL YIELDS `points` BUCKETS OVER THE RANGE
+def pick_resolution(start_ms, end_ms, points):
+    for table, bucket_ms in RESOLUTIONS:
+        if bucket_count(table, bucket_ms, start_ms, end_ms) >= points:
+            return table
+    return RESOLUTIONS[-1][0]
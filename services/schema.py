@@ -0,0 +1,227 @@
+from recommendation.recommendation_list import recommendations
+from services import rollups
+
+
+# VERSIONED SCHEMA MIGRATIONS
+# The applied version is kept in SQLite's PRAGMA user_version. Each migration
+# runs once, inside its own transaction, the first time a connection is opened.
+
+# MIGRATION 1: EVERY TABLE THE APP USES
+def _create_initial_schema(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user (
+            user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            first_name TEXT,
+            last_name TEXT,
+            gender TEXT,
+            birthday TEXT,
+            created_at TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS preferences_category (
+            category_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            category_name TEXT UNIQUE,
+            created_at TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS preferences (
+            preference_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            preference_name TEXT,
+            category_id INTEGER,
+            created_at TEXT,
+            FOREIGN KEY (category_id) REFERENCES preferences_category (category_id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_preferences_mapping (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            preference_id INTEGER,
+            created_at TEXT,
+            FOREIGN KEY (user_id) REFERENCES user(user_id),
+            FOREIGN KEY (preference_id) REFERENCES preferences(preference_id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS facial_expression_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            stress_value REAL NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS facial_expression_summary (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            stress_value REAL NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS facial_expression_monitoring (
+            value BOOLEAN
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS keystroke_summary (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            stress_label INTEGER NOT NULL,
+            stress_percentage REAL NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS overall_stress (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            facial_expression_stress REAL,
+            keystroke_stress REAL,
+            stress_level INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS error_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            error_message TEXT NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS recommendations_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            recommendation_id TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            feedback INTEGER,
+            updated_at TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS recommendation (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            level INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            score INTEGER NOT NULL
+        )
+    """)
+
+    # Monitoring is on by default
+    cursor.execute("SELECT COUNT(*) FROM facial_expression_monitoring")
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("INSERT INTO facial_expression_monitoring (value) VALUES (?)", (True,))
+
+    # Seed the recommendation catalog on a fresh database
+    cursor.execute("SELECT COUNT(*) FROM recommendation")
+    if cursor.fetchone()[0] == 0:
+        cursor.executemany(
+            "INSERT INTO recommendation (level, content, score) VALUES (?, ?, ?)",
+            [(level, item, 0) for level in recommendations for item in recommendations[level]]
+        )
+
+
+# MIGRATION 2: INTEGER EPOCH-MILLISECOND TIMESTAMPS WITH TIME INDEXES ON SAMPLE TABLES
+# Existing TEXT timestamps were written in local time, so they are converted with
+# the 'utc' modifier. Rows whose timestamp cannot be parsed are dropped.
+EPOCH_MS_TABLES = {
+    "facial_expression_data": "stress_value REAL NOT NULL",
+    "facial_expression_summary": "stress_value REAL NOT NULL",
+    "keystroke_summary": "stress_label INTEGER NOT NULL, stress_percentage REAL NOT NULL",
+    "overall_stress": "facial_expression_stress REAL, keystroke_stress REAL, stress_level INTEGER NOT NULL",
+}
+
+def _convert_timestamps_to_epoch_ms(cursor):
+    for table, columns in EPOCH_MS_TABLES.items():
+        column_names = ", ".join(column.split()[0] for column in columns.split(", "))
+        cursor.execute(f"""
+            CREATE TABLE {table}_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp INTEGER NOT NULL,
+                {columns}
+            )
+        """)
+        cursor.execute(f"""
+            INSERT INTO {table}_new (id, timestamp, {column_names})
+            SELECT id, epoch_ms, {column_names} FROM (
+                SELECT *,
+                    CASE WHEN typeof(timestamp) = 'integer' THEN timestamp
+                         ELSE CAST(strftime('%s', timestamp, 'utc') AS INTEGER) * 1000
+                    END AS epoch_ms
+                FROM {table}
+            )
+            WHERE epoch_ms IS NOT NULL
+        """)
+        cursor.execute(f"DROP TABLE {table}")
+        cursor.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        cursor.execute(f"CREATE INDEX idx_{table}_timestamp ON {table} (timestamp)")
+
+
+# MIGRATION 3: COVERING INDEX SO FACIAL WINDOW AGGREGATES NEVER TOUCH THE TABLE
+def _add_facial_window_covering_index(cursor):
+    cursor.execute("DROP INDEX IF EXISTS idx_facial_expression_data_timestamp")
+    cursor.execute("CREATE INDEX idx_facial_expression_data_timestamp_value ON facial_expression_data (timestamp, stress_value)")
+
+
+# MIGRATION 4: MINUTE / HOUR / DAY STRESS ROLLUPS, BACKFILLED FROM EXISTING SAMPLES
+def _create_stress_rollups(cursor):
+    for table, _ in rollups.RESOLUTIONS:
+        cursor.execute(f"""
+            CREATE TABLE {table} (
+                source TEXT NOT NULL,
+                bucket_start INTEGER NOT NULL,
+                sample_count INTEGER NOT NULL,
+                value_sum REAL NOT NULL,
+                value_max REAL NOT NULL,
+                peak_timestamp INTEGER NOT NULL,
+                PRIMARY KEY (source, bucket_start)
+            ) WITHOUT ROWID
+        """)
+        bucket = rollups.BUCKET_SQL[table].format(ts="timestamp")
+        for source, source_sql in rollups.SOURCE_SQL.items():
+            # SQLite takes the bare `timestamp` column from the row holding MAX(value)
+            cursor.execute(f"""
+                INSERT INTO {table} (source, bucket_start, sample_count, value_sum, value_max, peak_timestamp)
+                SELECT ?, bucket, COUNT(*), SUM(value), MAX(value), timestamp
+                FROM (SELECT {bucket} AS bucket, value, timestamp FROM ({source_sql}) WHERE value IS NOT NULL)
+                GROUP BY bucket
+            """, (source,))
+
+
+# (version, description, function(cursor)) IN ORDER. NEVER EDIT A SHIPPED ENTRY, APPEND A NEW ONE.
+MIGRATIONS = [
+    (1, "initial schema", _create_initial_schema),
+    (2, "epoch millisecond timestamps", _convert_timestamps_to_epoch_ms),
+    (3, "facial window covering index", _add_facial_window_covering_index),
+    (4, "stress rollups", _create_stress_rollups),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+# APPLY EVERY PENDING MIGRATION
+def migrate(conn):
+    if get_schema_version(conn) >= SCHEMA_VERSION:
+        return
+
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        for version, description, apply in MIGRATIONS:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Re-read inside the write lock in case another process migrated first
+                if version <= get_schema_version(conn):
+                    conn.execute("COMMIT")
+                    continue
+                apply(conn.cursor())
+                conn.execute(f"PRAGMA user_version = {version}")
+                conn.execute("COMMIT")
+                print(f"Database migrated to version {version} ({description}).")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+    finally:
+        conn.isolation_level = isolation_level
@@ -0,0 +1,45 @@
+import os
+from collections import namedtuple
+
+import cv2
+
+
+# Camera settings plus how often a frame is analysed (seconds)
+CaptureProfile = namedtuple("CaptureProfile", ["name", "width", "height", "fps", "fourcc", "analysis_interval"])
+
+# The CNN only sees a 48x48 grayscale crop, so modest resolutions lose little
+CAPTURE_PROFILES = {
+    "low-power": CaptureProfile("low-power", 320, 240, 5, "MJPG", 2.0),
+    "balanced": CaptureProfile("balanced", 640, 480, 15, "MJPG", 1.0),
+    "accuracy": CaptureProfile("accuracy", 1280, 720, 30, "MJPG", 1.0),
+}
+DEFAULT_PROFILE = "balanced"
+
+_active_profile = CAPTURE_PROFILES.get(os.environ.get("WELLMIND_CAPTURE_PROFILE", DEFAULT_PROFILE),
+                                       CAPTURE_PROFILES[DEFAULT_PROFILE])
+
+
+def get_capture_profile():
+    return _active_profile
+
+
+# SWITCH THE PROFILE AT RUNTIME; THE MONITORING LOOP RE-OPENS THE CAMERA ON ITS NEXT PASS
+def set_capture_profile(name):
+    global _active_profile
+    if name not in CAPTURE_PROFILES:
+        raise ValueError(f"Unknown capture profile '{name}', expected one of {sorted(CAPTURE_PROFILES)}")
+    _active_profile = CAPTURE_PROFILES[name]
+    return _active_profile
+
+
+# OPEN A CAMERA WITH A PROFILE APPLIED (USED FOR EVERY OPEN AND RE-OPEN)
+def open_capture(profile, index=0):
+    cap = cv2.VideoCapture(index)
+    # Pixel format first: some drivers only offer the larger sizes in MJPG
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*profile.fourcc))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, profile.width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, profile.height)
+    cap.set(cv2.CAP_PROP_FPS, profile.fps)
+    # Only the newest frame matters; do not let the driver queue old ones
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
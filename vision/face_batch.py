@@ -0,0 +1,45 @@
+import cv2
+import numpy as np
+
+from vision.inference_backends import INPUT_SHAPE
+
+
+# PREALLOCATED BATCH OF FACE CROPS FOR ONE MODEL CALL
+# Crops from one or several frames are resized and scaled to [0, 1] straight
+# into their slot of a (capacity, 48, 48, 1) float32 tensor, each with a key
+# (e.g. its track id). predict() runs the model once on the filled slots and
+# returns (key, probability) pairs in the order the crops were added.
+class FaceBatch:
+    def __init__(self, capacity):
+        self.faces = np.zeros((capacity,) + INPUT_SHAPE, dtype=np.float32)
+        self.keys = []
+        self._resized = np.empty(INPUT_SHAPE[:2], dtype=np.uint8)
+
+    @property
+    def capacity(self):
+        return len(self.faces)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def is_full(self):
+        return len(self.keys) == self.capacity
+
+    def clear(self):
+        self.keys = []
+
+    def add(self, gray, box, key):
+        if self.is_full():
+            raise ValueError(f"Face batch is full ({self.capacity} faces)")
+        x, y, w, h = box
+        cv2.resize(gray[y:y + h, x:x + w], INPUT_SHAPE[1::-1], dst=self._resized)
+        np.divide(self._resized, np.float32(255.0), out=self.faces[len(self.keys), :, :, 0])
+        self.keys.append(key)
+
+    def predict(self, model):
+        if not self.keys:
+            return []
+        outputs = model.predict(self.faces[:len(self.keys)])
+        results = list(zip(self.keys, outputs[:, 0].tolist()))
+        self.clear()
+        return results
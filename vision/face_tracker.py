@@ -0,0 +1,156 @@
+import cv2
+
+
+def box_iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    intersection = w * h
+    return intersection / (aw * ah + bw * bh - intersection)
+
+
+# DETECT-THEN-TRACK FACE LOCATOR
+# A full-frame Haar detection runs on the first frame, every redetect_every
+# frames and whenever a track is lost. In between, the cascade only searches a
+# padded region around each tracked face box, with its size range pinned near
+# that face's size, which is a small fraction of the full-frame work.
+# The cascade runs on a downscaled copy of the image: scaled so the smallest
+# tracked face is about adaptive_face_px wide, or, with no face known (or none
+# found at that scale), so the frame is detection_width pixels wide. Boxes are
+# mapped back to (x, y, w, h) in full-frame coordinates.
+# Up to max_faces faces (None: all) are tracked, largest first at each full
+# detection. Each track keeps its id while it is followed, and across full
+# detections when the new box overlaps its last box by match_iou, so a face
+# missed for up to forget_after frames comes back under the same id.
+class FaceTracker:
+    def __init__(self, face_cascade, redetect_every=10, padding=0.5, size_tolerance=0.3,
+                 scale_factor=1.1, min_neighbors=5, min_size=(30, 30),
+                 detection_width=320, adaptive_face_px=40, max_faces=1, match_iou=0.3,
+                 forget_after=30):
+        self.face_cascade = face_cascade
+        self.redetect_every = redetect_every
+        self.padding = padding
+        self.size_tolerance = size_tolerance
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+        # None disables the frame-width downscale / the face-size (adaptive) downscale
+        self.detection_width = detection_width
+        self.adaptive_face_px = adaptive_face_px
+        self.max_faces = max_faces
+        self.match_iou = match_iou
+        self.forget_after = forget_after
+        # (track_id, box) pairs found in the last frame
+        self.tracks = []
+        # track_id -> (last box, frame it was seen in), kept for forget_after frames
+        self.recent = {}
+        self.frame_index = 0
+        self.next_track_id = 0
+        self.last_face_width = None
+        self.frames_since_detection = 0
+        self.full_detections = 0
+        self.roi_detections = 0
+        self.lost = 0
+
+    # Track ids keep counting up, so faces seen after a reset start new tracks
+    def reset(self):
+        self.tracks = []
+        self.recent = {}
+        self.last_face_width = None
+        self.frames_since_detection = 0
+
+    # CASCADE ON A COPY SHRUNK BY scale; SIZES AND BOXES ARE IN FULL-RESOLUTION PIXELS
+    def _cascade(self, gray, min_size, max_size=None, scale=1.0):
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            min_size = tuple(max(1, int(v * scale)) for v in min_size)
+            max_size = max_size and tuple(int(v * scale) + 1 for v in max_size)
+        faces = self.face_cascade.detectMultiScale(
+            gray, scaleFactor=self.scale_factor, minNeighbors=self.min_neighbors,
+            minSize=min_size, maxSize=max_size or (0, 0), flags=cv2.CASCADE_SCALE_IMAGE)
+        boxes = (tuple(int(round(v / scale)) for v in face) for face in faces)
+        return sorted(boxes, key=lambda b: b[2] * b[3], reverse=True)
+
+    def _face_scale(self, face_width):
+        if not self.adaptive_face_px:
+            return 1.0
+        return min(1.0, self.adaptive_face_px / face_width)
+
+    def _frame_scale(self, gray):
+        if not self.detection_width:
+            return 1.0
+        return min(1.0, self.detection_width / gray.shape[1])
+
+    def detect_full(self, gray):
+        self.full_detections += 1
+        self.frames_since_detection = 0
+        scales = [self._frame_scale(gray)]
+        if self.last_face_width and self.adaptive_face_px:
+            scales.insert(0, self._face_scale(self.last_face_width))
+        for scale in dict.fromkeys(scales):
+            faces = self._cascade(gray, self.min_size, scale=scale)
+            if faces:
+                return faces
+        return []
+
+    def _search_roi(self, gray, box):
+        x, y, w, h = box
+        pad_x, pad_y = int(w * self.padding), int(h * self.padding)
+        x0, y0 = max(x - pad_x, 0), max(y - pad_y, 0)
+        x1, y1 = min(x + w + pad_x, gray.shape[1]), min(y + h + pad_y, gray.shape[0])
+        low, high = 1 - self.size_tolerance, 1 + self.size_tolerance
+        min_size = (max(int(w * low), self.min_size[0]), max(int(h * low), self.min_size[1]))
+        max_size = (int(w * high) + 1, int(h * high) + 1)
+        self.roi_detections += 1
+        faces = self._cascade(gray[y0:y1, x0:x1], min_size, max_size, self._face_scale(w))
+        return [(fx + x0, fy + y0, fw, fh) for fx, fy, fw, fh in faces]
+
+    # IDS FOR FRESHLY DETECTED BOXES: THE BEST-OVERLAPPING RECENT TRACK, ELSE A NEW ONE
+    def _match(self, faces):
+        previous = {track_id: box for track_id, (box, _) in self.recent.items()}
+        tracks = []
+        for face in faces:
+            overlaps = [(box_iou(face, box), track_id) for track_id, box in previous.items()]
+            overlap, track_id = max(overlaps, default=(0.0, None))
+            if overlap >= self.match_iou:
+                del previous[track_id]
+            else:
+                track_id = self.next_track_id
+                self.next_track_id += 1
+            tracks.append((track_id, face))
+        return tracks
+
+    # IDS OF THE TRACKS SEEN WITHIN THE LAST forget_after FRAMES
+    def known_track_ids(self):
+        return list(self.recent)
+
+    # (TRACK_ID, BOX) FOR EACH FACE IN A GRAYSCALE FRAME
+    def detect_tracks(self, gray):
+        self.frame_index += 1
+        tracks = []
+        if self.tracks and self.frames_since_detection < self.redetect_every:
+            self.frames_since_detection += 1
+            for track_id, box in self.tracks:
+                faces = self._search_roi(gray, box)
+                if not faces:
+                    self.lost += 1
+                    tracks = []
+                    break
+                # A neighbour can fall inside the padded region; keep the one that moved least
+                tracks.append((track_id, max(faces, key=lambda face: box_iou(face, box))))
+        if not tracks:
+            tracks = self._match(self.detect_full(gray)[:self.max_faces])
+        self.tracks = tracks
+        for track_id, box in tracks:
+            self.recent[track_id] = (box, self.frame_index)
+        for track_id, (_, seen) in list(self.recent.items()):
+            if self.frame_index - seen > self.forget_after:
+                del self.recent[track_id]
+        if tracks:
+            self.last_face_width = min(box[2] for _, box in tracks)
+        return tracks
+
+    # FACE BOXES IN A GRAYSCALE FRAME
+    def detect(self, gray):
+        return [box for _, box in self.detect_tracks(gray)]
@@ -0,0 +1,93 @@
+import threading
+import time
+
+
+# CAMERA CAPTURE THREAD WITH A SINGLE LATEST-FRAME SLOT
+# The thread keeps calling cap.grab(), which pulls the next frame off the device
+# so the driver queue never fills with stale frames, but does not decode it.
+# read() decodes only the most recent grab with cap.retrieve(), so frames the
+# analysis never asks for are never decoded or copied. The capture is only
+# touched under the condition's lock (VideoCapture is not thread-safe); when a
+# reader is waiting on an undelivered frame the grabber holds off until it has
+# been retrieved, so a reader cannot be starved by back-to-back grabs.
+class FrameGrabber:
+    def __init__(self, open_capture, retry_delay=0.5):
+        # open_capture() -> an opened, configured cv2.VideoCapture
+        self._open_capture = open_capture
+        self.retry_delay = retry_delay
+        self._condition = threading.Condition()
+        self._cap = None
+        self._thread = None
+        self._running = False
+        self._grabbed = 0
+        self._retrieved = 0
+        self._grab_ok = True
+        self._grabbed_at = 0.0
+        self._reader_waiting = False
+
+    @property
+    def is_running(self):
+        return self._running
+
+    def start(self):
+        with self._condition:
+            if self._running:
+                return
+            self._cap = self._open_capture()
+            self._running = True
+            self._grab_ok = True
+            self._grabbed = self._retrieved = 0
+        self._thread = threading.Thread(target=self._run, name="FrameGrabber", daemon=True)
+        self._thread.start()
+
+    # STOP GRABBING AND RELEASE THE CAMERA
+    def stop(self, timeout=2):
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        with self._condition:
+            if self._cap is not None:
+                self._cap.release()
+                self._cap = None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and self._reader_waiting and self._grabbed > self._retrieved:
+                    self._condition.wait(self.retry_delay)
+                if not self._running:
+                    return
+                ok = self._cap.grab()
+                self._grab_ok = ok
+                self._grabbed += 1
+                self._grabbed_at = time.monotonic()
+                self._condition.notify_all()
+            if not ok:
+                # Let the reader see the failure instead of spinning on a dead device
+                time.sleep(self.retry_delay)
+
+    # (ok, frame) FOR THE NEWEST FRAME NOT YET RETURNED, LIKE cap.read()
+    # Returns (False, None) if the camera failed, stopped or the timeout expired.
+    def read(self, timeout=5):
+        with self._condition:
+            self._reader_waiting = True
+            try:
+                fresh = self._condition.wait_for(
+                    lambda: not self._running or self._grabbed > self._retrieved, timeout)
+                if not fresh or not self._running or not self._grab_ok:
+                    return False, None
+                self._retrieved = self._grabbed
+                return self._cap.retrieve()
+            finally:
+                self._reader_waiting = False
+                self._condition.notify_all()
+
+    # SECONDS SINCE THE NEWEST GRAB (HOW STALE read() WOULD BE)
+    def frame_age(self):
+        with self._condition:
+            return time.monotonic() - self._grabbed_at if self._grabbed else None
@@ -0,0 +1,180 @@
+import os
+
+import numpy as np
+
+from vision.numpy_cnn import NumpyCNN
+
+# Facial CNN input: batches of 48x48 grayscale faces scaled to [0, 1]
+INPUT_SHAPE = (48, 48, 1)
+
+# The NumPy engine needs no TensorFlow; models it cannot run (e.g. the CBAM ones)
+# fall back to TFLite
+DEFAULT_BACKEND = "numpy"
+FALLBACK_BACKEND = "tflite"
+
+
+def _import_tensorflow():
+    os.environ.setdefault("TF_ENABLE_ONEDNN_OPTS", "0")
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "3")
+    import tensorflow as tf
+    return tf
+
+
+# CUSTOM LAYERS SOME OF OUR SAVED MODELS USE (cbam_cnn_stress_detection*.h5)
+def custom_objects():
+    tf = _import_tensorflow()
+
+    class CBAM(tf.keras.layers.Layer):
+        def __init__(self, reduction_ratio=8, **kwargs):
+            super(CBAM, self).__init__(**kwargs)
+            self.reduction_ratio = reduction_ratio
+
+        def build(self, input_shape):
+            channels = input_shape[-1]
+            self.channel_attention = tf.keras.Sequential([
+                tf.keras.layers.GlobalAveragePooling2D(),
+                tf.keras.layers.Dense(channels // self.reduction_ratio, activation='relu'),
+                tf.keras.layers.Dense(channels, activation='sigmoid')
+            ])
+            self.spatial_attention = tf.keras.layers.Conv2D(1, (7, 7), padding='same', activation='sigmoid')
+
+        def call(self, inputs):
+            avg_pool = tf.reduce_mean(inputs, axis=[1, 2], keepdims=True)
+            channel_att = self.channel_attention(avg_pool)
+            channel_refined = tf.keras.layers.Multiply()([inputs, channel_att])
+            spatial_att = self.spatial_attention(channel_refined)
+            return tf.keras.layers.Multiply()([channel_refined, spatial_att])
+
+    return {"CBAM": CBAM}
+
+
+def load_keras_model(model_path):
+    tf = _import_tensorflow()
+    return tf.keras.models.load_model(model_path, custom_objects=custom_objects(), compile=False)
+
+
+# REFERENCE: Model.predict, AS THE MONITOR USED TO CALL IT
+class KerasBackend:
+    name = "keras"
+
+    def __init__(self, model_path):
+        self.model = load_keras_model(model_path)
+
+    def predict(self, faces):
+        return np.asarray(self.model.predict(faces, verbose=0))
+
+
+# THE SAME MODEL CALLED THROUGH A TRACED tf.function
+# Skips Model.predict's per-call data-adapter and callback machinery; the graph is
+# traced once for any batch size.
+class TFFunctionBackend:
+    name = "tf-function"
+
+    def __init__(self, model_path):
+        tf = _import_tensorflow()
+        model = load_keras_model(model_path)
+        self._call = tf.function(
+            lambda faces: model(faces, training=False),
+            input_signature=[tf.TensorSpec((None,) + INPUT_SHAPE, tf.float32)],
+        )
+
+    def predict(self, faces):
+        return self._call(np.asarray(faces, dtype=np.float32)).numpy()
+
+
+# TFLITE INTERPRETER (XNNPACK CPU DELEGATE) ON A CONVERTED COPY OF THE MODEL
+# The .tflite file is written next to the .h5 on first use and reused while it is
+# newer than the source. quantization: None (float32), "dynamic" (int8 weights)
+# or "int8" (int8 weights and activations, calibrated on calibration_faces;
+# input and output stay float32).
+class TFLiteBackend:
+    name = "tflite"
+
+    def __init__(self, model_path, quantization=None, calibration_faces=None, num_threads=None):
+        if quantization:
+            self.name = f"tflite-{quantization}"
+        self.tflite_path = convert_to_tflite(model_path, quantization, calibration_faces)
+        self.interpreter = _tflite_interpreter(self.tflite_path, num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]["index"]
+        self._output = self.interpreter.get_output_details()[0]["index"]
+        self._batch_size = None
+
+    def predict(self, faces):
+        faces = np.asarray(faces, dtype=np.float32)
+        if faces.shape[0] != self._batch_size:
+            self.interpreter.resize_tensor_input(self._input, faces.shape)
+            self.interpreter.allocate_tensors()
+            self._batch_size = faces.shape[0]
+        self.interpreter.set_tensor(self._input, faces)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self._output).copy()
+
+
+# THE STANDALONE LiteRT RUNTIME WHEN INSTALLED (NO TENSORFLOW IMPORT), ELSE tf.lite
+def _tflite_interpreter(path, num_threads=None):
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        Interpreter = _import_tensorflow().lite.Interpreter
+    return Interpreter(model_path=path, num_threads=num_threads)
+
+
+def tflite_path(model_path, quantization=None):
+    return f"{os.path.splitext(model_path)[0]}.{quantization or 'float32'}.tflite"
+
+
+def convert_to_tflite(model_path, quantization=None, calibration_faces=None):
+    if quantization not in (None, "dynamic", "int8"):
+        raise ValueError(f"Unknown TFLite quantization '{quantization}'")
+    if quantization == "int8" and calibration_faces is None:
+        raise ValueError("int8 quantization needs calibration_faces")
+    path = tflite_path(model_path, quantization)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(model_path):
+        return path
+
+    tf = _import_tensorflow()
+    converter = tf.lite.TFLiteConverter.from_keras_model(load_keras_model(model_path))
+    if quantization:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "int8":
+        faces = np.asarray(calibration_faces, dtype=np.float32)
+        converter.representative_dataset = lambda: ([face[np.newaxis]] for face in faces)
+    flatbuffer = converter.convert()
+    # Written aside and renamed, so an interrupted conversion never leaves a
+    # truncated file that looks newer than the model
+    with open(path + ".tmp", "wb") as f:
+        f.write(flatbuffer)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+BACKENDS = {
+    KerasBackend.name: KerasBackend,
+    TFFunctionBackend.name: TFFunctionBackend,
+    TFLiteBackend.name: TFLiteBackend,
+    "tflite-dynamic": lambda model_path, **options: TFLiteBackend(model_path, quantization="dynamic", **options),
+    NumpyCNN.name: NumpyCNN,
+}
+
+
+# BACKEND CHOSEN AT STARTUP (WELLMIND_FACIAL_BACKEND), e.g. "numpy", "tflite" or "keras"
+def load_backend(model_path, name=None, **options):
+    name = name or os.environ.get("WELLMIND_FACIAL_BACKEND")
+    if name is None:
+        try:
+            return BACKENDS[DEFAULT_BACKEND](model_path, **options)
+        except ValueError as e:
+            print(f" {DEFAULT_BACKEND} backend unavailable ({e}), using {FALLBACK_BACKEND}")
+            name = FALLBACK_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown facial inference backend '{name}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name](model_path, **options)
+
+
+# LARGEST ABSOLUTE DIFFERENCE FROM THE REFERENCE OUTPUTS; RAISES IF ABOVE tolerance
+def check_backend(backend, faces, reference_outputs, tolerance):
+    difference = float(np.max(np.abs(backend.predict(faces) - reference_outputs)))
+    if difference > tolerance:
+        raise ValueError(f"{backend.name} differs from the reference by {difference:.2e} (tolerance {tolerance:.0e})")
+    return difference
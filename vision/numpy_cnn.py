@@ -0,0 +1,242 @@
+import json
+
+import h5py
+import numpy as np
+
+
+# ACTIVATIONS BY THEIR KERAS NAMES
+def _sigmoid(x):
+    return np.exp(-np.logaddexp(0, -x)).astype(x.dtype, copy=False)
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "sigmoid": _sigmoid,
+    "tanh": np.tanh,
+    "softmax": _softmax,
+}
+
+
+def _activation(config):
+    name = config.get("activation") or "linear"
+    if isinstance(name, dict):
+        name = name.get("config", {}).get("name", name.get("class_name"))
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation '{name}'")
+    return ACTIVATIONS[name]
+
+
+# TOP/LEFT PADDING AND OUTPUT SIZE ALONG ONE AXIS, AS KERAS COMPUTES THEM
+def _padding(size, kernel, stride, padding):
+    if padding == "valid":
+        return 0, 0, (size - kernel) // stride + 1
+    out = -(-size // stride)
+    total = max((out - 1) * stride + kernel - size, 0)
+    return total // 2, total - total // 2, out
+
+
+# WINDOWS OF A (N, H, W, C) BATCH AS (N, OH, OW, KH, KW, C), ONE SLICE COPY PER KERNEL OFFSET
+def _windows(x, kernel, strides, padding, fill=0.0):
+    n, h, w, c = x.shape
+    (kh, kw), (sh, sw) = kernel, strides
+    top, bottom, oh = _padding(h, kh, sh, padding)
+    left, right, ow = _padding(w, kw, sw, padding)
+    if top or bottom or left or right:
+        x = np.pad(x, ((0, 0), (top, bottom), (left, right), (0, 0)), constant_values=fill)
+    cols = np.empty((n, oh, ow, kh, kw, c), dtype=x.dtype)
+    for i in range(kh):
+        for j in range(kw):
+            cols[:, :, :, i, j] = x[:, i:i + sh * oh:sh, j:j + sw * ow:sw]
+    return cols
+
+
+# CONV2D AS IM2COL + ONE GEMM; THE KERAS (KH, KW, C, F) KERNEL MATCHES THE COLUMN ORDER
+class Conv2D:
+    def __init__(self, config, weights):
+        if tuple(config.get("dilation_rate", (1, 1))) != (1, 1) or config.get("groups", 1) != 1:
+            raise ValueError(f"Conv2D '{config['name']}': dilation and groups are not supported")
+        kernel = weights["kernel"]
+        self.kernel_size = kernel.shape[:2]
+        self.strides = tuple(config.get("strides", (1, 1)))
+        self.padding = config.get("padding", "valid")
+        self.kernel = np.ascontiguousarray(kernel.reshape(-1, kernel.shape[-1]))
+        self.bias = weights.get("bias")
+        self.activation = _activation(config)
+
+    def __call__(self, x):
+        cols = _windows(x, self.kernel_size, self.strides, self.padding)
+        n, oh, ow = cols.shape[:3]
+        y = cols.reshape(n * oh * ow, -1) @ self.kernel
+        if self.bias is not None:
+            y += self.bias
+        return self.activation(y).reshape(n, oh, ow, -1)
+
+
+class Dense:
+    def __init__(self, config, weights):
+        self.kernel = weights["kernel"]
+        self.bias = weights.get("bias")
+        self.activation = _activation(config)
+
+    def __call__(self, x):
+        y = x @ self.kernel
+        if self.bias is not None:
+            y += self.bias
+        return self.activation(y)
+
+
+# INFERENCE-MODE BATCH NORM, FOLDED INTO ONE SCALE AND SHIFT PER CHANNEL
+class BatchNormalization:
+    def __init__(self, config, weights):
+        axis = config.get("axis", -1)
+        if axis not in (-1, [-1], 3, [3]):
+            raise ValueError(f"BatchNormalization '{config['name']}': only the channel axis is supported")
+        variance = weights["moving_variance"]
+        scale = weights.get("gamma", np.ones_like(variance)) / np.sqrt(variance + config.get("epsilon", 1e-3))
+        self.scale = scale.astype(np.float32)
+        self.shift = (weights.get("beta", np.zeros_like(variance)) - weights["moving_mean"] * scale).astype(np.float32)
+
+    def __call__(self, x):
+        return x * self.scale + self.shift
+
+
+class MaxPooling2D:
+    def __init__(self, config, weights):
+        self.pool_size = tuple(config.get("pool_size", (2, 2)))
+        self.strides = tuple(config.get("strides") or self.pool_size)
+        self.padding = config.get("padding", "valid")
+
+    def __call__(self, x):
+        if self.padding == "valid" and self.pool_size == self.strides:
+            (ph, pw), (n, h, w, c) = self.pool_size, x.shape
+            oh, ow = h // ph, w // pw
+            return x[:, :oh * ph, :ow * pw].reshape(n, oh, ph, ow, pw, c).max(axis=(2, 4))
+        return _windows(x, self.pool_size, self.strides, self.padding, fill=-np.inf).max(axis=(3, 4))
+
+
+class AveragePooling2D(MaxPooling2D):
+    def __call__(self, x):
+        if self.padding != "valid":
+            raise ValueError("AveragePooling2D: only 'valid' padding is supported")
+        return _windows(x, self.pool_size, self.strides, self.padding).mean(axis=(3, 4))
+
+
+class GlobalAveragePooling2D:
+    def __init__(self, config, weights):
+        self.keepdims = config.get("keepdims", False)
+
+    def __call__(self, x):
+        return x.mean(axis=(1, 2), keepdims=self.keepdims)
+
+
+class Flatten:
+    def __init__(self, config, weights):
+        pass
+
+    def __call__(self, x):
+        return x.reshape(x.shape[0], -1)
+
+
+class Activation:
+    def __init__(self, config, weights):
+        self.activation = _activation(config)
+
+    def __call__(self, x):
+        return self.activation(x)
+
+
+# LAYERS THAT DO NOTHING AT INFERENCE TIME
+class Identity:
+    def __init__(self, config, weights):
+        pass
+
+    def __call__(self, x):
+        return x
+
+
+LAYERS = {
+    "Conv2D": Conv2D,
+    "Dense": Dense,
+    "BatchNormalization": BatchNormalization,
+    "MaxPooling2D": MaxPooling2D,
+    "AveragePooling2D": AveragePooling2D,
+    "GlobalAveragePooling2D": GlobalAveragePooling2D,
+    "Flatten": Flatten,
+    "Activation": Activation,
+    "InputLayer": Identity,
+    "Dropout": Identity,
+    "SpatialDropout2D": Identity,
+    "GaussianNoise": Identity,
+    "GaussianDropout": Identity,
+}
+
+
+def _decode(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+# WEIGHTS OF ONE LAYER KEYED BY SHORT NAME ("kernel", "bias", "gamma", ...)
+# Keras 2 names them "conv2d/kernel:0", Keras 3 "sequential/conv2d/kernel".
+def _layer_weights(group):
+    weights = {}
+    for name in group.attrs.get("weight_names", []):
+        name = _decode(name)
+        short = name.rsplit("/", 1)[-1].split(":")[0]
+        weights[short] = np.asarray(group[name], dtype=np.float32)
+    return weights
+
+
+# THE LAYER STACK OF A SEQUENTIAL KERAS .h5 (FULL MODEL OR LEGACY FORMAT), READ WITH h5py
+def load_layers(model_path):
+    with h5py.File(model_path, "r") as f:
+        if "model_config" not in f.attrs:
+            raise ValueError(f"{model_path} has no model_config; save the full model, not just weights")
+        config = json.loads(_decode(f.attrs["model_config"]))
+        if config["class_name"] != "Sequential":
+            raise ValueError(f"{model_path}: only Sequential models are supported, got {config['class_name']}")
+        layer_configs = config["config"]
+        if isinstance(layer_configs, dict):
+            layer_configs = layer_configs["layers"]
+        weight_groups = f["model_weights"] if "model_weights" in f else f
+
+        layers = []
+        for layer in layer_configs:
+            class_name, layer_config = layer["class_name"], layer["config"]
+            if class_name not in LAYERS:
+                raise ValueError(f"{model_path}: layer '{layer_config['name']}' ({class_name}) "
+                                 f"is not supported by the NumPy engine")
+            group = weight_groups.get(layer_config["name"])
+            weights = _layer_weights(group) if group is not None else {}
+            layers.append(LAYERS[class_name](layer_config, weights))
+    return layers
+
+
+# KERAS-FREE FORWARD PASS OVER (N, 48, 48, 1) FLOAT32 BATCHES
+# Dropout and friends are skipped and batch norm uses its moving statistics, as in
+# Model.predict. Outputs match Keras to float32 rounding. Large batches run in
+# chunks of max_batch faces, which keeps the im2col buffers (about 2.6 MiB per
+# face for a 3x3, 32-channel conv at 48x48) small enough to stay in cache.
+class NumpyCNN:
+    name = "numpy"
+
+    def __init__(self, model_path, max_batch=4):
+        self.layers = load_layers(model_path)
+        self.max_batch = max_batch
+
+    def _forward(self, x):
+        for layer in self.layers:
+            x = layer(x)
+        return x
+
+    def predict(self, faces):
+        faces = np.asarray(faces, dtype=np.float32)
+        if len(faces) <= self.max_batch:
+            return self._forward(faces)
+        return np.concatenate([self._forward(faces[i:i + self.max_batch])
+                               for i in range(0, len(faces), self.max_batch)])
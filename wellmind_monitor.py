@@ -4,6 +4,7 @@ import keystroke
 from facial_expression import facial_expression_monitoring
 import multiprocessing
 from facialExpressionSummary import calculate_facial_expression_summary
+from services.database import init_database, start_maintenance
 
 # import customtkinter as ctk
 # import tkinter as tk
@@ -20,6 +21,10 @@ import avatar
 if __name__ == "__main__":
     multiprocessing.freeze_support()
 
+    # Apply pending schema migrations before any worker thread touches the database
+    init_database()
+    start_maintenance()
+
     facial_expression_thread = threading.Thread(target=facial_expression_monitoring, daemon=True)
     pred_thread = threading.Thread(target=keystroke.predict_and_store, daemon=True)
 